@@ -8,7 +8,10 @@ import gspread
 from google.colab import auth
 from google.auth import default
 from google.colab import drive
-from datetime import datetime
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+import threading
+import random
 import time
 import os
 import csv
@@ -20,6 +23,17 @@ SITE = 'xxx'
 SITE_API_KEY = 'xxx'
 SHEET_URL = 'xxx'
 TIMEZONE = pytz.timezone("CET")
+STATUS_BATCH_SIZE = 100  # status cells sent per Sheets API call
+CONCURRENCY = 4  # parallel Chargebee requests
+RATE_LIMIT_PER_SEC = 2  # sustained Chargebee requests per second
+MAX_RETRIES = 5  # attempts per invoice on 429 responses
+BACKOFF_BASE = 1.0  # seconds, doubled on every retry
+LEDGER_PATH = os.path.join(LOG_FOLDER, "payment_ledger.jsonl")
+LEDGER_RETENTION_DAYS = 90  # ledger entries older than this are dropped on compaction
+
+# Header names looked up in the first sheet row, with the legacy indices as fallback
+COLUMN_HEADERS = {"date": "Date", "amount": "Amount", "identifier": "Invoice Identifier", "status": "Status"}
+DEFAULT_COLUMN_INDICES = {"date": 13, "amount": 17, "identifier": 19, "status": 26}
 
 # Initialize Chargebee
 chargebee.configure(SITE_API_KEY, SITE)
@@ -59,14 +73,130 @@ def get_data_from_sheet(spreadsheet, sheet_index=1):
         raise RuntimeError(f"Error accessing worksheet or data: {e}")
 
 
-def filter_rows(data, today, date_col_index, identifier_col_index):
-    """Filter rows where the date matches and identifier starts with 'IN'."""
-    headers = data[0]
+def resolve_columns(headers):
+    """Map the configured header names to column indices."""
+    header_index = {header.strip().lower(): index for index, header in enumerate(headers)}
+    columns = {}
+    for name, header in COLUMN_HEADERS.items():
+        if header.lower() in header_index:
+            columns[name] = header_index[header.lower()]
+        else:
+            columns[name] = DEFAULT_COLUMN_INDICES[name]
+            print(f"Header '{header}' not found, using column index {columns[name]}")
+    return columns
+
+
+def get_columns_from_sheet(spreadsheet, sheet_index=1, names=("date", "amount", "identifier")):
+    """Fetch only the named columns of the worksheet with a single range request.
+
+    Returns the worksheet, the rows narrowed to `names` (header row first),
+    the index of each name within those rows and the full-sheet column map.
+    """
+    try:
+        worksheet = spreadsheet.get_worksheet(sheet_index)
+        columns = resolve_columns(worksheet.row_values(1))
+        ranges = []
+        for name in names:
+            letter = gspread.utils.rowcol_to_a1(1, columns[name] + 1)[:-1]
+            ranges.append(f"{letter}2:{letter}")
+        value_ranges = worksheet.batch_get(ranges)
+    except Exception as e:
+        raise RuntimeError(f"Error accessing worksheet or data: {e}")
+
+    column_values = [[cell[0] if cell else "" for cell in value_range] for value_range in value_ranges]
+    row_count = max((len(values) for values in column_values), default=0)
+    for values in column_values:
+        values.extend([""] * (row_count - len(values)))
+
+    data = [list(names)] + list(zip(*column_values))
+    narrow_index = {name: index for index, name in enumerate(names)}
+    return worksheet, data, narrow_index, columns
+
+
+class PaymentLedger:
+    """Append-only JSONL record of payments already pushed to Chargebee.
+
+    Entries are keyed by (invoice, amount, date) and held in a set for O(1) lookups.
+    Every append is fsync'd. A torn last line from a crash is cut off on load, so the
+    next append starts on a fresh line. Safe to call from several threads.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.entries = set()
+        self.lock = threading.Lock()
+        if os.path.exists(path):
+            with open(path, "r+b") as ledger_file:
+                data = ledger_file.read()
+                complete = data.rfind(b"\n") + 1
+                if complete < len(data):
+                    ledger_file.truncate(complete)
+                    ledger_file.flush()
+                    os.fsync(ledger_file.fileno())
+            for line in data[:complete].decode("utf-8", errors="replace").splitlines():
+                try:
+                    entry = json.loads(line)
+                    self.entries.add((entry["invoice"], entry["amount"], entry["date"]))
+                except (ValueError, KeyError):
+                    continue
+
+    def __contains__(self, key):
+        return key in self.entries
+
+    def record(self, invoice_number, amount, date):
+        """Append a payment and force it to disk before returning."""
+        key = (invoice_number, amount, date)
+        line = json.dumps({"invoice": invoice_number, "amount": amount, "date": date})
+        with self.lock:
+            if key in self.entries:
+                return
+            with open(self.path, "a", encoding="utf-8") as ledger_file:
+                ledger_file.write(line + "\n")
+                ledger_file.flush()
+                os.fsync(ledger_file.fileno())
+            self.entries.add(key)
+
+    def compact(self, retention_days=LEDGER_RETENTION_DAYS):
+        """Rewrite the ledger without duplicates and entries past the retention window."""
+        cutoff = datetime.now(TIMEZONE).date() - timedelta(days=retention_days)
+        kept = set()
+        for invoice_number, amount, date in self.entries:
+            try:
+                if datetime.strptime(date, "%d.%m.%Y").date() < cutoff:
+                    continue
+            except ValueError:
+                pass
+            kept.add((invoice_number, amount, date))
+
+        tmp_path = self.path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as ledger_file:
+            for invoice_number, amount, date in sorted(kept):
+                ledger_file.write(json.dumps({"invoice": invoice_number, "amount": amount, "date": date}) + "\n")
+            ledger_file.flush()
+            os.fsync(ledger_file.fileno())
+        os.replace(tmp_path, self.path)
+        self.entries = kept
+
+
+def filter_rows(data, today, date_col_index, identifier_col_index, amount_col_index=None, ledger=None):
+    """Filter rows where the date matches and identifier starts with 'IN'.
+
+    When a ledger is given, rows whose payment was already recorded are skipped.
+    """
     rows = data[1:]
-    return [
-        (index, row) for index, row in enumerate(rows, start=2)
-        if row[date_col_index].strip() == today and row[identifier_col_index].strip().startswith("IN")
+    # Work column-wise: every cell is stripped once, and only matching rows are paired back up
+    dates = [row[date_col_index].strip() for row in rows]
+    identifiers = [row[identifier_col_index].strip() for row in rows]
+    matches = [
+        position for position, (date, identifier) in enumerate(zip(dates, identifiers))
+        if date == today and identifier.startswith("IN")
     ]
+    if ledger is not None:
+        matches = [
+            position for position in matches
+            if (identifiers[position], rows[position][amount_col_index].strip(), today) not in ledger
+        ]
+    return [(position + 2, rows[position]) for position in matches]
 
 
 def record_payment(invoice_number, amount):
@@ -81,6 +211,77 @@ def record_payment(invoice_number, amount):
     return chargebee.Invoice.record_payment(invoice_number, payment_data)
 
 
+class TokenBucket:
+    """Thread-safe token bucket shared by all payment workers."""
+
+    def __init__(self, rate, capacity=None):
+        self.rate = rate
+        self.capacity = capacity or rate
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self.blocked_until = 0.0
+        self.lock = threading.Lock()
+
+    def acquire(self):
+        """Block until a request may be sent."""
+        while True:
+            with self.lock:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if now >= self.blocked_until and self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                wait = max(self.blocked_until - now, (1 - self.tokens) / self.rate)
+            time.sleep(wait)
+
+    def pause(self, seconds):
+        """Hold back every worker, e.g. after a 429 with Retry-After."""
+        with self.lock:
+            self.blocked_until = max(self.blocked_until, time.monotonic() + seconds)
+            self.tokens = 0
+
+
+def get_retry_after(error):
+    """Return the Retry-After delay in seconds from a 429 error, if present."""
+    headers = getattr(error, "headers", None) or {}
+    try:
+        return float(headers.get("Retry-After"))
+    except (TypeError, ValueError):
+        return None
+
+
+def record_payment_with_retry(invoice_number, amount, bucket):
+    """Record a payment, backing off with jitter while Chargebee returns 429."""
+    for attempt in range(MAX_RETRIES):
+        bucket.acquire()
+        try:
+            return record_payment(invoice_number, amount)
+        except Exception as e:
+            if getattr(e, "http_status_code", None) != 429 or attempt == MAX_RETRIES - 1:
+                raise
+            delay = get_retry_after(e) or BACKOFF_BASE * 2 ** attempt
+            delay += random.uniform(0, delay / 2)
+            print(f"Rate limited on Invoice {invoice_number}, retrying in {delay:.1f}s")
+            bucket.pause(delay)
+
+
+def push_payment(invoice_number, amount, bucket, ledger=None, payment_date=None):
+    """Record a payment in Chargebee and write it to the ledger right away.
+
+    Chargebee errors are raised. A payment Chargebee accepted is never reported as failed:
+    a ledger write error is returned as a message instead.
+    """
+    record_payment_with_retry(invoice_number, amount, bucket)
+    if ledger is None:
+        return None
+    try:
+        ledger.record(invoice_number, amount, payment_date)
+    except OSError as e:
+        return f"Ledger write failed: {e}"
+    return None
+
+
 def log_to_csv(log_filename, successful_payments, failed_payments):
     """Save logs to a CSV file."""
     try:
@@ -96,28 +297,87 @@ def log_to_csv(log_filename, successful_payments, failed_payments):
         print(f"Error saving logs: {e}")
 
 
-def process_payments(filtered_rows, worksheet, status_col_index):
-    """Process payments and log results."""
+class StatusWriteBuffer:
+    """Collect status cell updates and send them to the sheet in batches."""
+
+    def __init__(self, worksheet, status_col_index, batch_size=STATUS_BATCH_SIZE):
+        self.worksheet = worksheet
+        self.status_col = status_col_index + 1
+        self.batch_size = batch_size
+        self.pending = []
+
+    def add(self, row_index, message):
+        """Queue a status message and flush once the batch is full."""
+        cell = gspread.utils.rowcol_to_a1(row_index, self.status_col)
+        self.pending.append({"range": cell, "values": [[message]]})
+        if len(self.pending) >= self.batch_size:
+            self.flush()
+
+    def flush(self):
+        """Write all queued status messages with a single API call."""
+        if not self.pending:
+            return
+        self.worksheet.batch_update(self.pending)
+        self.pending = []
+
+
+def process_payments(filtered_rows, worksheet, status_col_index, identifier_col_index, amount_col_index,
+                     concurrency=CONCURRENCY, ledger=None, payment_date=None):
+    """Process payments and log results.
+
+    Payments are recorded by up to `concurrency` threads sharing one rate limiter;
+    results are collected in row order so the logs match a sequential run.
+    Each worker writes its payment to the ledger (if given) under `payment_date` as soon
+    as Chargebee confirms it. Ledger and Sheets errors are reported separately and never
+    turn a recorded payment into a failed one.
+    """
     payments_pushed, errors_encountered = 0, 0
     successful_payments, failed_payments = [], []
+    status_buffer = StatusWriteBuffer(worksheet, status_col_index)
+    bucket = TokenBucket(RATE_LIMIT_PER_SEC)
+    executor = ThreadPoolExecutor(max_workers=max(1, concurrency))
 
-    for row_index, row in filtered_rows:
-        invoice_number = row[identifier_col_index].strip()
-        amount = row[amount_col_index].strip()
-
+    def write_status(row_index=None, message=None):
         try:
+            if row_index is None:
+                status_buffer.flush()
+            else:
+                status_buffer.add(row_index, message)
+        except Exception as e:
+            print(f"Error writing status to the sheet: {e}")
+
+    jobs, handled = [], 0
+    try:
+        for row_index, row in filtered_rows:
+            invoice_number = row[identifier_col_index].strip()
+            amount = row[amount_col_index].strip()
             if invoice_number and amount:
-                record_payment(invoice_number, amount)
-                payments_pushed += 1
-                successful_payments.append((invoice_number, amount))
-                success_message = f"Success - {datetime.now(TIMEZONE).strftime('%Y-%m-%d %H:%M:%S')}"
-                worksheet.update_cell(row_index, status_col_index + 1, success_message)
+                future = executor.submit(push_payment, invoice_number, amount, bucket, ledger, payment_date)
+                jobs.append((row_index, invoice_number, amount, future))
             else:
                 print(f"Skipping invalid data: Invoice {invoice_number}, Amount {amount}")
-        except Exception as e:
-            errors_encountered += 1
-            print(f"Error recording payment for Invoice {invoice_number}: {e}")
-            failed_payments.append((invoice_number, amount, str(e)))
+
+        for row_index, invoice_number, amount, future in jobs:
+            try:
+                ledger_error = future.result()
+            except Exception as e:
+                errors_encountered += 1
+                print(f"Error recording payment for Invoice {invoice_number}: {e}")
+                failed_payments.append((invoice_number, amount, str(e)))
+            else:
+                payments_pushed += 1
+                successful_payments.append((invoice_number, amount))
+                if ledger_error:
+                    print(f"Payment for Invoice {invoice_number} was recorded in Chargebee. {ledger_error}")
+                write_status(row_index, f"Success - {datetime.now(TIMEZONE).strftime('%Y-%m-%d %H:%M:%S')}")
+            handled += 1
+    finally:
+        # Also runs on KeyboardInterrupt so recorded payments keep their status
+        executor.shutdown(wait=True, cancel_futures=True)
+        for row_index, invoice_number, amount, future in jobs[handled:]:
+            if not future.cancelled() and future.exception() is None:
+                write_status(row_index, f"Success - {datetime.now(TIMEZONE).strftime('%Y-%m-%d %H:%M:%S')}")
+        write_status()
 
     return payments_pushed, errors_encountered, successful_payments, failed_payments
 
@@ -127,16 +387,24 @@ def main():
     try:
         setup_google_drive()
         spreadsheet = authenticate_google_sheets()
-        worksheet, data = get_data_from_sheet(spreadsheet)
+        worksheet, data, narrow_index, columns = get_columns_from_sheet(spreadsheet)
 
         today = datetime.now(TIMEZONE).strftime("%d.%m.%Y")
-        date_col_index, amount_col_index, identifier_col_index, status_col_index = 13, 17, 19, 26
+        date_col_index = narrow_index["date"]
+        amount_col_index = narrow_index["amount"]
+        identifier_col_index = narrow_index["identifier"]
+        status_col_index = columns["status"]
+
+        ledger = PaymentLedger(LEDGER_PATH)
+        ledger.compact()
 
-        filtered_rows = filter_rows(data, today, date_col_index, identifier_col_index)
-        print(f"Found {len(filtered_rows)} rows matching today's date and identifier condition.")
+        filtered_rows = filter_rows(data, today, date_col_index, identifier_col_index, amount_col_index, ledger)
+        print(f"Found {len(filtered_rows)} rows matching today's date and identifier condition "
+              f"not yet recorded in the ledger.")
 
         payments_pushed, errors_encountered, successful_payments, failed_payments = process_payments(
-            filtered_rows, worksheet, status_col_index)
+            filtered_rows, worksheet, status_col_index, identifier_col_index, amount_col_index,
+            ledger=ledger, payment_date=today)
 
         print(f"Processing completed. Payments pushed: {payments_pushed}, Errors: {errors_encountered}")
 
@@ -0,0 +1,77 @@
+"""Peak memory of eml_parser2's Excel output against the previous in-memory workbook.
+
+Generates N synthetic .eml files (plain text and HTML bodies), then reports
+wall time and tracemalloc peak for write_to_excel (write-only workbook, rows
+streamed) and for the old approach that appended every row to a regular
+openpyxl Workbook before saving. Both run with workers=1 so all parsing
+happens in this process and is traced.
+
+    python benchmarks/bench_eml_parser2.py [emails] [body_kb]
+"""
+
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+from email.message import EmailMessage
+
+import openpyxl
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from eml_parser2 import parse_eml, write_to_excel  # noqa: E402
+
+
+def write_corpus(folder, count, body_kb):
+    paragraph = "Sehr geehrte Damen und Herren, anbei die Rechnung für den laufenden Monat. "
+    body = (paragraph * (body_kb * 1024 // len(paragraph) + 1))[:body_kb * 1024]
+    eml_files = []
+    for i in range(count):
+        msg = EmailMessage()
+        msg["From"] = f"sender{i}@example.com"
+        msg["Subject"] = f"Rechnung {i}"
+        msg["Date"] = "Mon, 05 Feb 2024 10:00:00 +0100"
+        msg.set_content(body)
+        if i % 2:
+            msg.add_alternative(f"<html><body><p>{body}</p></body></html>", subtype="html")
+        eml_file = os.path.join(folder, f"{i:06d}.eml")
+        with open(eml_file, "w", encoding="utf-8") as f:
+            f.write(msg.as_string())
+        eml_files.append(eml_file)
+    return eml_files
+
+
+def write_to_excel_in_memory(eml_files, output_file):
+    """The previous write_to_excel: every row is kept in a regular workbook until save."""
+    workbook = openpyxl.Workbook()
+    worksheet = workbook.active
+    worksheet.append(["Sender", "Subject", "Date", "Body"])
+    for eml_file in eml_files:
+        worksheet.append(list(parse_eml(eml_file)))
+    workbook.save(output_file)
+
+
+def measure(function, *args):
+    tracemalloc.start()
+    start = time.perf_counter()
+    function(*args)
+    seconds = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return seconds, peak
+
+
+if __name__ == "__main__":
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    body_kb = int(sys.argv[2]) if len(sys.argv) > 2 else 8
+    with tempfile.TemporaryDirectory() as folder:
+        eml_files = write_corpus(folder, count, body_kb)
+        print(f"{count} emails, ~{body_kb} KB body each")
+        runs = (
+            ("write-only", lambda: write_to_excel(eml_files, os.path.join(folder, "streamed.xlsx"), workers=1)),
+            ("in-memory", lambda: write_to_excel_in_memory(eml_files, os.path.join(folder, "in_memory.xlsx"))),
+        )
+        for name, run in runs:
+            seconds, peak = measure(run)
+            print(f"{name:11s} {seconds:7.2f} s   peak {peak / 1e6:7.1f} MB")
@@ -0,0 +1,86 @@
+"""Compare transcript/checkpoint I/O per segment count.
+
+Feeds N synthetic segments through transcribe_resumable_with_timestamps with a
+stub model, so only output and checkpoint I/O is measured, and compares it
+with the previous behaviour: write + flush the .txt line and rewrite the
+checkpoint after every segment. Requires faster_whisper to be importable.
+
+    python benchmarks/bench_gr2gr_transcriber.py [segments ...]
+"""
+
+import json
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+from types import SimpleNamespace
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import gr2gr_transcriber as transcriber  # noqa: E402
+
+
+def synthetic_segments(count):
+    return [SimpleNamespace(start=i * 2.0, end=i * 2.0 + 2.0, text=f" Segment {i} με κείμενο", words=None)
+            for i in range(count)]
+
+
+class StubModel:
+    def __init__(self, segments):
+        self.segments = segments
+
+    def transcribe(self, *args, **kwargs):
+        return iter(self.segments), None
+
+
+def run_per_segment(mp3_path, segments):
+    """The loop before checkpoint batching: every segment is flushed and checkpointed."""
+    checkpoint_path = mp3_path.with_suffix(transcriber.CHECKPOINT_SUFFIX)
+    checkpoint = {"last_end": 0.0}
+    with mp3_path.with_suffix(".txt").open("w", encoding="utf-8") as out:
+        for segment in segments:
+            out.write(f"[{transcriber.sec_to_hms(segment.start)} → {transcriber.sec_to_hms(segment.end)}] "
+                      f"{segment.text.strip()}\n")
+            out.flush()
+            checkpoint["last_end"] = segment.end
+            checkpoint_path.write_text(json.dumps(checkpoint), encoding="utf-8")
+    checkpoint_path.unlink(missing_ok=True)
+
+
+def run_current(mp3_path, segments, formats, every_segments):
+    transcriber.CHECKPOINT_EVERY_SEGMENTS = every_segments
+    transcriber.load_model = lambda cpu_threads=0: StubModel(segments)
+    transcriber.transcribe_resumable_with_timestamps(str(mp3_path), formats=formats)
+
+
+def timed(function, *args):
+    with tempfile.TemporaryDirectory() as folder:
+        mp3_path = Path(folder) / "audio.mp3"
+        mp3_path.write_bytes(b"")
+        start = time.perf_counter()
+        function(mp3_path, *args)
+        return time.perf_counter() - start
+
+
+if __name__ == "__main__":
+    counts = [int(arg) for arg in sys.argv[1:]] or [500, 2000, 8000]
+    every = transcriber.CHECKPOINT_EVERY_SEGMENTS
+    columns = ["per segment", "batched txt", "batched all", "fsync/seg"]
+    print(f"{'segments':>8s}" + "".join(f"{column:>14s}" for column in columns))
+    for count in counts:
+        segments = synthetic_segments(count)
+        with open(os.devnull, "w") as devnull:
+            stdout, sys.stdout = sys.stdout, devnull
+            try:
+                results = [
+                    timed(run_per_segment, segments),
+                    timed(run_current, segments, ("txt",), every),
+                    timed(run_current, segments, ("txt", "srt", "vtt", "jsonl"), every),
+                    timed(run_current, segments, ("txt",), 1),
+                ]
+            finally:
+                sys.stdout = stdout
+        print(f"{count:8d}" + "".join(f"{seconds:13.3f}s" for seconds in results))
+    print(f"batched = checkpoint every {every} segments or {transcriber.CHECKPOINT_EVERY_SECONDS:.0f}s with fsync; "
+          "fsync/seg = the same code checkpointing after every segment")
@@ -0,0 +1,48 @@
+"""Compare the streaming HTMLParser extractor with the BeautifulSoup path.
+
+Builds a synthetic page, then reports the best-of-N time and the peak traced
+memory of extract_text and extract_text_soup. Requires bs4.
+
+    python benchmarks/bench_html_text_parser.py [blocks] [repeats]
+"""
+
+import os
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from html_text_parser_ import extract_text, extract_text_soup  # noqa: E402
+
+
+def build_page(blocks):
+    parts = ["<html><head><meta charset='utf-8'><style>p { color: red; }</style></head><body>"]
+    for i in range(blocks):
+        parts.append(f"<div><h2>Section {i}</h2><p>Grüße aus Absatz {i}, mit <b>fett</b> und <a href='#'>Link</a>.</p>"
+                     f"<script>var n{i} = {i};</script>\n   \n</div>")
+    parts.append("</body></html>")
+    return "".join(parts).encode("utf-8")
+
+
+def measure(function, content, repeats):
+    best = float("inf")
+    for _ in range(repeats):
+        start = time.perf_counter()
+        function(content)
+        best = min(best, time.perf_counter() - start)
+    tracemalloc.start()
+    function(content)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return best, peak
+
+
+if __name__ == "__main__":
+    blocks = int(sys.argv[1]) if len(sys.argv) > 1 else 20000
+    repeats = int(sys.argv[2]) if len(sys.argv) > 2 else 3
+    content = build_page(blocks)
+    print(f"{blocks} blocks, {len(content) / 1e6:.1f} MB of HTML, best of {repeats}")
+    for name, function in (("HTMLParser", extract_text), ("BeautifulSoup", extract_text_soup)):
+        seconds, peak = measure(function, content, repeats)
+        print(f"{name:14s} {seconds:7.3f} s   peak {peak / 1e6:6.1f} MB")
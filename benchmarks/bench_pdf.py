@@ -0,0 +1,71 @@
+"""Throughput of folder and single-file PDF extraction at increasing worker counts.
+
+Generates text PDFs with the helper from tests/test_pdf.py, then times
+convert_pdf_folder on a folder of small statements and iter_pdf_pages_parallel
+on one long PDF for workers = 1, 2, 4, ... up to the CPU count.
+
+    python benchmarks/bench_pdf.py [files] [pages_per_file] [long_pdf_pages]
+"""
+
+import os
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.join(ROOT, "tests"))
+
+from pdf import convert_pdf_folder, iter_pdf_pages_parallel  # noqa: E402
+from test_pdf import write_text_pdf  # noqa: E402
+
+
+def worker_counts():
+    counts, workers = [], 1
+    while workers < (os.cpu_count() or 1):
+        counts.append(workers)
+        workers *= 2
+    return counts + [os.cpu_count() or 1]
+
+
+def statement_page(name, page):
+    return " ".join(f"{day:02d}.02.2024 {name} Buchung {page}-{day} 1.234,56 9.876,54" for day in range(1, 28))
+
+
+if __name__ == "__main__":
+    files = int(sys.argv[1]) if len(sys.argv) > 1 else 40
+    pages_per_file = int(sys.argv[2]) if len(sys.argv) > 2 else 6
+    long_pdf_pages = int(sys.argv[3]) if len(sys.argv) > 3 else 400
+
+    with tempfile.TemporaryDirectory() as folder:
+        folder = Path(folder)
+        pdf_folder = folder / "pdfs"
+        pdf_folder.mkdir()
+        for i in range(files):
+            name = f"statement{i:03d}"
+            write_text_pdf(pdf_folder / f"{name}.pdf", [statement_page(name, page) for page in range(pages_per_file)])
+        long_pdf = folder / "long.pdf"
+        write_text_pdf(long_pdf, [statement_page("long", page) for page in range(long_pdf_pages)])
+
+        total_pages = files * pages_per_file
+        print(f"folder: {files} PDFs x {pages_per_file} pages; single file: {long_pdf_pages} pages")
+        print(f"{'workers':>7s} {'folder s':>9s} {'pages/s':>8s} {'single s':>9s} {'pages/s':>8s}")
+        for workers in worker_counts():
+            start = time.perf_counter()
+            with open(os.devnull, "w") as devnull:
+                stdout, sys.stdout = sys.stdout, devnull
+                try:
+                    convert_pdf_folder(str(pdf_folder), str(folder / f"xlsx{workers}"), workers=workers)
+                finally:
+                    sys.stdout = stdout
+            folder_seconds = time.perf_counter() - start
+
+            start = time.perf_counter()
+            with ProcessPoolExecutor(max_workers=workers) as executor:
+                sum(1 for _ in iter_pdf_pages_parallel(str(long_pdf), executor))
+            single_seconds = time.perf_counter() - start
+
+            print(f"{workers:7d} {folder_seconds:9.2f} {total_pages / folder_seconds:8.0f} "
+                  f"{single_seconds:9.2f} {long_pdf_pages / single_seconds:8.0f}")
@@ -0,0 +1,70 @@
+"""Merge time of py_merge_multiple_csv_files against the previous line-by-line copy.
+
+Generates N large CSV files twice: once all with the same header (copy_files,
+raw byte copy) and once with a column that only every other file has
+(align_files, merged by column name). Both are timed against the old script,
+which read every file line by line and wrote each line to the output (for
+mixed headers that is fast but leaves the columns misaligned).
+
+    python benchmarks/bench_py_merge_multiple_csv_files.py [files] [rows_per_file]
+"""
+
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from py_merge_multiple_csv_files import align_files, copy_files, read_header  # noqa: E402
+
+
+def write_files(folder, count, rows, mixed):
+    input_files = []
+    for i in range(count):
+        extra = mixed and i % 2
+        path = os.path.join(folder, f"{'mixed' if mixed else 'same'}_{i}.csv")
+        with open(path, "w", newline="", encoding="utf-8") as f:
+            f.write("employee_id,date,hours,reason" + (",approved_by" if extra else "") + "\n")
+            for row in range(rows):
+                line = f"{i * rows + row},2022-04-{row % 28 + 1:02d},{row % 9}.5,sick leave"
+                f.write(line + (",manager" if extra else "") + "\n")
+        input_files.append(path)
+    return input_files
+
+
+def copy_line_by_line(input_files, output_file):
+    """The previous script: every line of every file goes through a Python write."""
+    with open(output_file, "w") as fout:
+        for index, path in enumerate(input_files):
+            with open(path) as f:
+                if index > 0:
+                    next(f)
+                for line in f:
+                    fout.write(line)
+
+
+def measure(function, *args):
+    start = time.perf_counter()
+    function(*args)
+    return time.perf_counter() - start
+
+
+if __name__ == "__main__":
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 20
+    rows = int(sys.argv[2]) if len(sys.argv) > 2 else 200_000
+    with tempfile.TemporaryDirectory() as folder:
+        output_file = os.path.join(folder, "out.csv")
+        same_files = write_files(folder, count, rows, mixed=False)
+        mixed_files = write_files(folder, count, rows, mixed=True)
+        size = sum(os.path.getsize(path) for path in same_files)
+        print(f"{count} files x {rows} rows ({size / 1e6:.0f} MB per set)")
+        runs = (
+            ("same schema, copy_files", lambda: copy_files(same_files, output_file)),
+            ("same schema, line by line", lambda: copy_line_by_line(same_files, output_file)),
+            ("mixed schema, align_files", lambda: align_files(
+                mixed_files, output_file, [read_header(path) for path in mixed_files])),
+            ("mixed schema, line by line", lambda: copy_line_by_line(mixed_files, output_file)),
+        )
+        for name, run in runs:
+            print(f"{name:27s} {measure(run):7.2f} s")
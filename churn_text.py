@@ -0,0 +1,205 @@
+"""Churn feedback cleaning and word counts, extracted from text_analysis.ipynb.
+
+Reads the churn export row by row (XLSX or CSV), tokenizes every reason once
+against a single German + English stopword set and counts words incrementally,
+so top-N statistics come out of one pass over the data.
+
+TermIndex persists unigram and bigram counts per month and segment in SQLite,
+so period and trend questions are answered without re-tokenizing anything.
+Exports that grow by appended rows only have their new rows indexed.
+"""
+
+import csv
+import os
+import sqlite3
+from collections import Counter
+from datetime import date, datetime
+from itertools import islice
+
+import openpyxl
+
+from text_to_py_list import Tokenizer
+
+CHURN_COLUMN = 'Reason for churn'
+DATE_COLUMN = 'Churn Date'
+SEGMENT_COLUMN = 'Segment'
+TERM_INDEX_FILE = 'churn_terms.sqlite'
+
+churn_tokenizer = Tokenizer(languages=('german', 'english'))
+
+# clean a single value like the notebook did: lowercase, drop stopwords, keep alphabetic words
+def clean_text(text, tokenizer=churn_tokenizer):
+    if isinstance(text, str):
+        return ' '.join(tokenizer.tokenize(text))
+    return text
+
+# stream tuples of the given columns from an .xlsx or .csv export without loading the whole file
+def iter_columns(path, column_names):
+    if path.lower().endswith('.csv'):
+        with open(path, newline='', encoding='utf-8') as csv_file:
+            for row in csv.DictReader(csv_file):
+                yield tuple(row.get(column_name) for column_name in column_names)
+        return
+
+    workbook = openpyxl.load_workbook(path, read_only=True)
+    try:
+        rows = workbook.active.iter_rows(values_only=True)
+        header = next(rows, ())
+        for column_name in column_names:
+            if column_name not in header:
+                raise KeyError(f"Column '{column_name}' not found in {path}")
+        column_indices = [header.index(column_name) for column_name in column_names]
+        for row in rows:
+            yield tuple(row[index] if index < len(row) else None for index in column_indices)
+    finally:
+        workbook.close()
+
+def iter_column(path, column_name=CHURN_COLUMN):
+    for (value,) in iter_columns(path, [column_name]):
+        yield value
+
+# count words over the column in a single pass; duplicate cleaned reasons are counted once
+def count_words(path, column_name=CHURN_COLUMN, tokenizer=churn_tokenizer, drop_duplicates=True, workers=1):
+    texts = (value for value in iter_column(path, column_name) if isinstance(value, str))
+    word_counts = Counter()
+    seen = set()
+    for tokens in tokenizer.batch(texts, workers=workers):
+        if drop_duplicates:
+            cleaned = ' '.join(tokens)
+            if cleaned in seen:
+                continue
+            seen.add(cleaned)
+        word_counts.update(tokens)
+    return word_counts
+
+def top_words(word_counts, n=50):
+    return word_counts.most_common(n)
+
+# month key like '2023-04' from an Excel date or a dd.mm.yyyy / ISO date string
+def to_period(value):
+    if isinstance(value, (date, datetime)):
+        return value.strftime('%Y-%m')
+    if isinstance(value, str):
+        value = value.strip()
+        for date_format in ('%d.%m.%Y', '%Y-%m-%d', '%Y-%m-%d %H:%M:%S'):
+            try:
+                return datetime.strptime(value, date_format).strftime('%Y-%m')
+            except ValueError:
+                continue
+    return None
+
+def iter_ngrams(tokens):
+    yield from ((token, 1) for token in tokens)
+    yield from ((f"{first} {second}", 2) for first, second in zip(tokens, tokens[1:]))
+
+class TermIndex:
+    """Unigram and bigram counts per month and segment, persisted in SQLite.
+
+    Rows are tokenized once when they are added; queries only aggregate stored counts.
+    """
+
+    def __init__(self, index_file=TERM_INDEX_FILE, tokenizer=churn_tokenizer):
+        self.tokenizer = tokenizer
+        self.connection = sqlite3.connect(index_file)
+        self.connection.executescript(
+            "CREATE TABLE IF NOT EXISTS terms ("
+            "period TEXT, segment TEXT, term TEXT, n INTEGER, count INTEGER, "
+            "PRIMARY KEY (period, segment, term));"
+            "CREATE INDEX IF NOT EXISTS terms_by_term ON terms (term, period);"
+            "CREATE TABLE IF NOT EXISTS sources (path TEXT PRIMARY KEY, size INTEGER, mtime INTEGER, rows INTEGER);"
+        )
+
+    # tokenize (text, date, segment) rows into n-gram counts; rows without a valid date are skipped
+    def count_rows(self, rows):
+        counts = Counter()
+        added = 0
+        for text, day, segment in rows:
+            period = to_period(day)
+            if not isinstance(text, str) or period is None:
+                continue
+            segment = str(segment) if segment is not None else ''
+            for term, n in iter_ngrams(self.tokenizer.tokenize(text)):
+                counts[(period, segment, term, n)] += 1
+            added += 1
+        return counts, added
+
+    # upsert counts; call inside a transaction
+    def store_counts(self, counts):
+        self.connection.executemany(
+            "INSERT INTO terms VALUES (?, ?, ?, ?, ?) "
+            "ON CONFLICT (period, segment, term) DO UPDATE SET count = count + excluded.count",
+            ((period, segment, term, n, count) for (period, segment, term, n), count in counts.items()),
+        )
+
+    def add_rows(self, rows):
+        counts, added = self.count_rows(rows)
+        with self.connection:
+            self.store_counts(counts)
+        return added
+
+    # add the rows of an export that are not indexed yet; an unchanged file is skipped.
+    # Exports are expected to grow by appending rows, only rows past the recorded count are read.
+    # Pass segment_column=None for exports without a segment column
+    def add_file(self, path, column_name=CHURN_COLUMN, date_column=DATE_COLUMN, segment_column=SEGMENT_COLUMN):
+        stat = os.stat(path)
+        path = os.path.abspath(path)
+        known = self.connection.execute("SELECT size, mtime, rows FROM sources WHERE path = ?", (path,)).fetchone()
+        if known and known[:2] == (stat.st_size, stat.st_mtime_ns):
+            return 0
+        if known and stat.st_size < known[0]:
+            raise ValueError(f"{path} is smaller than when it was indexed; only appended rows can be added")
+        indexed_rows = known[2] if known else 0
+
+        if segment_column:
+            rows = iter_columns(path, [column_name, date_column, segment_column])
+        else:
+            rows = ((text, day, None) for text, day in iter_columns(path, [column_name, date_column]))
+        total_rows = 0
+        def counted(rows):
+            nonlocal total_rows
+            for row in rows:
+                total_rows += 1
+                yield row
+        counts, added = self.count_rows(islice(counted(rows), indexed_rows, None))
+
+        # counts and the source row are committed together, a crash can't index rows twice
+        with self.connection:
+            self.store_counts(counts)
+            self.connection.execute(
+                "INSERT OR REPLACE INTO sources VALUES (?, ?, ?, ?)", (path, stat.st_size, stat.st_mtime_ns, total_rows)
+            )
+        return added
+
+    # top terms between two months (inclusive), optionally for one segment or n-gram size
+    def top_terms(self, start_period, end_period=None, n=50, segment=None, ngram=None):
+        query = "SELECT term, SUM(count) AS total FROM terms WHERE period BETWEEN ? AND ?"
+        params = [start_period, end_period or start_period]
+        if segment is not None:
+            query += " AND segment = ?"
+            params.append(segment)
+        if ngram is not None:
+            query += " AND n = ?"
+            params.append(ngram)
+        query += " GROUP BY term ORDER BY total DESC, term LIMIT ?"
+        params.append(n)
+        return self.connection.execute(query, params).fetchall()
+
+    # monthly counts of one term, optionally for one segment
+    def trend(self, term, segment=None):
+        query = "SELECT period, SUM(count) FROM terms WHERE term = ?"
+        params = [term.lower()]
+        if segment is not None:
+            query += " AND segment = ?"
+            params.append(segment)
+        query += " GROUP BY period ORDER BY period"
+        return self.connection.execute(query, params).fetchall()
+
+    def close(self):
+        self.connection.close()
+
+if __name__ == '__main__':
+    input_file = '2022_2023_churn_SF.xlsx'
+
+    print(f"Top 50 words in '{CHURN_COLUMN}' column:")
+    for word, count in top_words(count_words(input_file)):
+        print(word, "-", count)
@@ -1,63 +1,310 @@
 import os
 import email
+import mailbox
+import sqlite3
+import time
 import openpyxl
 import html2text
+from collections import deque
+from email.parser import BytesParser
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice
+
+# Excel limits; larger outputs continue on a new sheet / in extra body columns
+EXCEL_MAX_ROWS = 1048576
+EXCEL_MAX_CELL_CHARS = 32767
+
+# Parallel parsing: worker processes (None = one per CPU) and files per dispatched chunk
+WORKERS = None
+CHUNK_SIZE = 64
+CHUNKS_AHEAD_PER_WORKER = 4  # chunks queued per worker while results are written
+
+HEADER_COLUMNS = ["Sender", "Subject", "Date"]
+
+# Parse cache: maximum number of cached emails (least recently used are evicted)
+CACHE_MAX_ENTRIES = 200000
+
+# One HTML converter per process, created on first use
+_text_converter = None
+
+# Function to get the HTML converter of the current process
+def get_text_converter():
+    global _text_converter
+    if _text_converter is None:
+        _text_converter = html2text.HTML2Text()
+    return _text_converter
+
+# Function to extract sender, subject and date from a parsed message
+def extract_headers(msg):
+    # Headers with raw non-ASCII bytes come back as Header objects
+    return tuple(None if msg[name] is None else str(msg[name]) for name in ("From", "Subject", "Date"))
+
+# Function to extract the plain text body from a parsed message
+def extract_body(msg):
+    body = ""
+
+    # Extract the email body, which may be multipart or plain text
+    if msg.is_multipart():
+        for part in msg.walk():
+            content_type = part.get_content_type()
+            content_disposition = str(part.get("Content-Disposition"))
+
+            if "attachment" not in content_disposition:
+                payload = part.get_payload(decode=True)
+                if payload is not None:
+                    if content_type == "text/html":
+                        # Convert HTML to plain text
+                        text_converter = get_text_converter()
+                        payload_text = text_converter.handle(payload.decode("utf-8", errors="ignore"))
+                        body += payload_text
+                    else:
+                        body += payload.decode("utf-8", errors="ignore")
+    else:
+        payload = msg.get_payload(decode=True)
+        if payload is not None:
+            body = payload.decode("utf-8", errors="ignore")
+
+    return body
 
 # Function to parse an .eml file and extract relevant information
 def parse_eml(eml_file):
     with open(eml_file, "r", encoding="utf-8") as eml_data:
         msg = email.message_from_file(eml_data)
-        sender = msg["From"]
-        subject = msg["Subject"]
-        date = msg["Date"]
-        body = ""
-
-        # Extract the email body, which may be multipart or plain text
-        if msg.is_multipart():
-            for part in msg.walk():
-                content_type = part.get_content_type()
-                content_disposition = str(part.get("Content-Disposition"))
-
-                if "attachment" not in content_disposition:
-                    payload = part.get_payload(decode=True)
-                    if payload is not None:
-                        if content_type == "text/html":
-                            # Convert HTML to plain text
-                            text_converter = html2text.HTML2Text()
-                            payload_text = text_converter.handle(payload.decode("utf-8", errors="ignore"))
-                            body += payload_text
-                        else:
-                            body += payload.decode("utf-8", errors="ignore")
-        else:
-            payload = msg.get_payload(decode=True)
-            if payload is not None:
-                body = payload.decode("utf-8", errors="ignore")
+        sender, subject, date = extract_headers(msg)
+        body = extract_body(msg)
 
     return sender, subject, date, body
 
-# Function to write email data to an Excel file
-def write_to_excel(eml_files, output_file):
-    workbook = openpyxl.Workbook()
-    worksheet = workbook.active
+# Function to parse an .eml file, returning the error instead of raising it
+def parse_eml_safe(eml_file):
+    try:
+        return eml_file, parse_eml(eml_file), None
+    except Exception as e:
+        return eml_file, None, f"{type(e).__name__}: {e}"
+
+# Function to parse one chunk of .eml files in a worker process
+def parse_eml_chunk(eml_files):
+    return [parse_eml_safe(eml_file) for eml_file in eml_files]
+
+# Function to parse .eml files in worker processes, yielding results in input order
+# Only a bounded window of chunks is in flight, so eml_files can be a lazy generator
+def parse_eml_files(eml_files, workers=WORKERS, chunk_size=CHUNK_SIZE):
+    if workers == 1:
+        yield from map(parse_eml_safe, eml_files)
+        return
+    eml_files = iter(eml_files)
+    window = CHUNKS_AHEAD_PER_WORKER * (workers or os.cpu_count() or 1)
+    pending = deque()
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        for chunk in iter(lambda: list(islice(eml_files, chunk_size)), []):
+            if len(pending) >= window:
+                yield from pending.popleft().result()
+            pending.append(executor.submit(parse_eml_chunk, chunk))
+        while pending:
+            yield from pending.popleft().result()
+
+# Cache of parsed emails keyed by path, size and modification time
+class ParseCache:
+    def __init__(self, cache_file, max_entries=CACHE_MAX_ENTRIES):
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self.connection = sqlite3.connect(cache_file)
+        self.connection.execute(
+            "CREATE TABLE IF NOT EXISTS parsed ("
+            "path TEXT PRIMARY KEY, size INTEGER, mtime INTEGER, "
+            "sender TEXT, subject TEXT, date TEXT, body TEXT, last_used REAL)"
+        )
+        self.connection.execute("CREATE INDEX IF NOT EXISTS parsed_last_used ON parsed (last_used)")
+
+    @staticmethod
+    def fingerprint(eml_file):
+        stat = os.stat(eml_file)
+        return stat.st_size, stat.st_mtime_ns
+
+    # Check whether an unchanged copy of the file is cached, counting hits and misses
+    def contains(self, eml_file, fingerprint):
+        row = self.connection.execute(
+            "SELECT size, mtime FROM parsed WHERE path = ?", (eml_file,)
+        ).fetchone()
+        if row is not None and tuple(row) == fingerprint:
+            self.hits += 1
+            return True
+        self.misses += 1
+        return False
+
+    def get(self, eml_file):
+        self.connection.execute("UPDATE parsed SET last_used = ? WHERE path = ?", (time.time(), eml_file))
+        return tuple(self.connection.execute(
+            "SELECT sender, subject, date, body FROM parsed WHERE path = ?", (eml_file,)
+        ).fetchone())
+
+    def put(self, eml_file, fingerprint, parsed):
+        self.connection.execute(
+            "INSERT OR REPLACE INTO parsed VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+            (eml_file, *fingerprint, *parsed, time.time()),
+        )
 
-    # Write headers
-    headers = ["Sender", "Subject", "Date", "Body"]
-    worksheet.append(headers)
+    # Evict least recently used entries over the cap and write everything to disk
+    def close(self):
+        self.connection.execute(
+            "DELETE FROM parsed WHERE path NOT IN "
+            "(SELECT path FROM parsed ORDER BY last_used DESC LIMIT ?)",
+            (self.max_entries,),
+        )
+        self.connection.commit()
+        self.connection.close()
 
+# Function to yield parse results in input order, parsing only files missing from the cache
+def parse_eml_files_cached(eml_files, cache, workers=WORKERS):
+    lookups = []
     for eml_file in eml_files:
-        sender, subject, date, body = parse_eml(eml_file)
-        worksheet.append([sender, subject, date, body])
+        fingerprint = cache.fingerprint(eml_file)
+        lookups.append((eml_file, fingerprint, cache.contains(eml_file, fingerprint)))
+
+    misses = [eml_file for eml_file, _, cached in lookups if not cached]
+    parsed_misses = parse_eml_files(misses, workers)
+    try:
+        for eml_file, fingerprint, cached in lookups:
+            if cached:
+                yield eml_file, cache.get(eml_file), None
+                continue
+            eml_file, parsed, error = next(parsed_misses)
+            if error is None:
+                cache.put(eml_file, fingerprint, parsed)
+            yield eml_file, parsed, error
+    finally:
+        parsed_misses.close()
+
+# Function to split text into chunks that fit into a single Excel cell
+def split_cell(text):
+    return [text[i:i + EXCEL_MAX_CELL_CHARS] for i in range(0, len(text), EXCEL_MAX_CELL_CHARS)] or [""]
+
+# Function to build a worksheet row; bodies over the cell limit continue in the following columns
+def format_row(sender, subject, date, body=None):
+    row = [sender, subject, date]
+    if body is not None:
+        row += split_cell(body)
+    return row
+
+# Function to stream rows into an Excel file
+def write_rows_to_excel(rows, output_file, headers):
+    # Write-only mode streams rows to disk, so memory stays flat for large exports
+    workbook = openpyxl.Workbook(write_only=True)
+    worksheet = None
+    rows_in_sheet = EXCEL_MAX_ROWS
+
+    for row in rows:
+        # Start a new sheet (with headers) once the current one is full
+        if rows_in_sheet >= EXCEL_MAX_ROWS:
+            worksheet = workbook.create_sheet(f"Emails {len(workbook.worksheets) + 1}")
+            worksheet.append(headers)
+            rows_in_sheet = 1
+
+        worksheet.append(row)
+        rows_in_sheet += 1
+
+    if worksheet is None:
+        workbook.create_sheet("Emails 1").append(headers)
 
     workbook.save(output_file)
 
+# Function to write email data to an Excel file
+def write_to_excel(eml_files, output_file, workers=WORKERS, cache=None):
+    failed_files = []
+    if cache is None:
+        results = parse_eml_files(eml_files, workers)
+    else:
+        results = parse_eml_files_cached(eml_files, cache, workers)
+
+    def rows():
+        for eml_file, parsed, error in results:
+            if error:
+                print(f"Failed to parse {eml_file}: {error}")
+                failed_files.append((eml_file, error))
+                continue
+            yield format_row(*parsed)
+
+    write_rows_to_excel(rows(), output_file, HEADER_COLUMNS + ["Body"])
+    return failed_files
+
+# Function to open an mbox file or a Maildir folder without unpacking it
+def open_mailbox(mailbox_path):
+    if os.path.isdir(os.path.join(mailbox_path, "cur")):
+        return mailbox.Maildir(mailbox_path, factory=None, create=False)
+    return mailbox.mbox(mailbox_path, create=False)
+
+# Function to read the header block of a message, stopping at the blank line before the body
+def read_header_bytes(message_file):
+    lines = []
+    for line in iter(message_file.readline, b""):
+        if line in (b"\n", b"\r\n"):
+            break
+        lines.append(line)
+    return b"".join(lines)
+
+# Function to stream messages from a mailbox; bodies are only read when include_body is set
+def parse_mailbox(mailbox_path, include_body=True):
+    box = open_mailbox(mailbox_path)
+    parser = BytesParser()
+    try:
+        for key in box.iterkeys():
+            message_id = f"{mailbox_path}#{key}"
+            try:
+                with box.get_file(key) as message_file:
+                    if include_body:
+                        msg = parser.parse(message_file)
+                    else:
+                        msg = parser.parsebytes(read_header_bytes(message_file), headersonly=True)
+                parsed = extract_headers(msg)
+                if include_body:
+                    parsed += (extract_body(msg),)
+                yield message_id, parsed, None
+            except Exception as e:
+                yield message_id, None, f"{type(e).__name__}: {e}"
+    finally:
+        box.close()
+
+# Function to write the messages of an mbox file or Maildir folder to an Excel file
+def write_mailbox_to_excel(mailbox_path, output_file, include_body=True):
+    failed_messages = []
+
+    def rows():
+        for message_id, parsed, error in parse_mailbox(mailbox_path, include_body):
+            if error:
+                print(f"Failed to parse {message_id}: {error}")
+                failed_messages.append((message_id, error))
+                continue
+            yield format_row(*parsed)
+
+    headers = HEADER_COLUMNS + ["Body"] if include_body else HEADER_COLUMNS
+    write_rows_to_excel(rows(), output_file, headers)
+    return failed_messages
+
 if __name__ == "__main__":
     eml_folder = r"C:\Users\v.garyfallos\Downloads\eml"  # Replace with the path to your .eml files folder
     output_excel = r"C:\Users\v.garyfallos\Downloads\eml\output.xlsx"       # Replace with the desired output Excel file name
+    cache_file = os.path.join(eml_folder, "eml_cache.sqlite")  # Parsed emails are reused on the next run
+    mailbox_path = None  # Set to an mbox file or Maildir folder to read it directly instead of eml_folder
+    include_body = True  # Set to False for a sender/subject/date report that skips body decoding
 
-    eml_files = [os.path.join(eml_folder, file) for file in os.listdir(eml_folder) if file.endswith(".eml")]
-
-    if eml_files:
-        write_to_excel(eml_files, output_excel)
+    if mailbox_path:
+        failed_messages = write_mailbox_to_excel(mailbox_path, output_excel, include_body)
         print("Data has been written to", output_excel)
+        if failed_messages:
+            print(f"{len(failed_messages)} message(s) could not be parsed.")
     else:
-        print("No .eml files found in the specified folder.")
+        eml_files = [os.path.join(eml_folder, file) for file in os.listdir(eml_folder) if file.endswith(".eml")]
+
+        if eml_files:
+            cache = ParseCache(cache_file)
+            try:
+                failed_files = write_to_excel(eml_files, output_excel, cache=cache)
+            finally:
+                cache.close()
+            print("Data has been written to", output_excel)
+            print(f"Cache: {cache.hits} hit(s), {cache.misses} miss(es)")
+            if failed_files:
+                print(f"{len(failed_files)} file(s) could not be parsed.")
+        else:
+            print("No .eml files found in the specified folder.")
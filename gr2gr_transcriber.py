@@ -1,11 +1,52 @@
 from faster_whisper import WhisperModel
+from faster_whisper.audio import decode_audio
+from faster_whisper.vad import VadOptions, get_speech_timestamps
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, as_completed, wait
+from itertools import islice
 from pathlib import Path
+import glob
+import hashlib
+import os
+import shutil
+import sqlite3
 import sys
 import json
+import time
 
 CHECKPOINT_SUFFIX = ".checkpoint.json"
+CHUNKS_CHECKPOINT_SUFFIX = ".chunks.json"
 OUTPUT_SUFFIX = ".txt"
 
+MODEL_SIZE = "medium"
+LANGUAGE = "el"
+SAMPLING_RATE = 16000
+CHUNK_SECONDS = 300  # target chunk length for parallel mode, cut only in silence
+WORKERS = 2  # parallel mode processes, each with its own model
+
+# The checkpoint is saved after this many segments or seconds, whichever comes first
+CHECKPOINT_EVERY_SEGMENTS = 50
+CHECKPOINT_EVERY_SECONDS = 30.0
+OUTPUT_FORMATS = ("txt",)  # any of "txt", "srt", "vtt", "jsonl"
+
+# Batch mode: job table kept next to the audio files
+JOBS_DB_NAME = "transcription_jobs.sqlite"
+AUDIO_EXTENSIONS = (".mp3", ".wav", ".m4a", ".flac", ".ogg")
+PROGRESS_INTERVAL = 30.0  # seconds between progress updates of running jobs
+
+_model = None
+
+
+def load_model(cpu_threads=0):
+    global _model
+    if _model is None:
+        _model = WhisperModel(
+            MODEL_SIZE,
+            device="cpu",
+            compute_type="int8",
+            cpu_threads=cpu_threads
+        )
+    return _model
+
 
 def sec_to_hms(seconds: float) -> str:
     h = int(seconds // 3600)
@@ -14,10 +55,120 @@ def sec_to_hms(seconds: float) -> str:
     return f"{h:02d}:{m:02d}:{s:02d}"
 
 
-def transcribe_resumable_with_timestamps(mp3_path: str):
+def sec_to_timestamp(seconds: float, separator: str) -> str:
+    ms = int(round(seconds * 1000))
+    return f"{ms // 3600000:02d}:{ms // 60000 % 60:02d}:{ms // 1000 % 60:02d}{separator}{ms % 1000:03d}"
+
+
+class TranscriptSink:
+    """Appends segments to one output file; subclasses define the format."""
+    suffix = OUTPUT_SUFFIX
+
+    def __init__(self, path: Path, offset: int, count: int):
+        # Drop anything written after the last checkpoint, it will be transcribed again
+        self.file = path.open("a+b")
+        if offset is None:
+            offset = self.file.seek(0, os.SEEK_END)
+        self.file.truncate(offset)
+        self.file.seek(0, os.SEEK_END)
+        self.count = count
+        if offset == 0:
+            self.file.write(self.header().encode("utf-8"))
+
+    def header(self) -> str:
+        return ""
+
+    def format(self, start, end, text, words) -> str:
+        raise NotImplementedError
+
+    def write(self, start, end, text, words=None):
+        self.count += 1
+        self.file.write(self.format(start, end, text, words).encode("utf-8"))
+
+    def flush(self) -> int:
+        # fsync so a checkpoint saved afterwards never points past data on disk
+        self.file.flush()
+        os.fsync(self.file.fileno())
+        return self.file.tell()
+
+    def close(self):
+        self.file.close()
+
+
+class TextSink(TranscriptSink):
+    def format(self, start, end, text, words):
+        return f"[{sec_to_hms(start)} → {sec_to_hms(end)}] {text}\n"
+
+
+class SrtSink(TranscriptSink):
+    suffix = ".srt"
+
+    def format(self, start, end, text, words):
+        return f"{self.count}\n{sec_to_timestamp(start, ',')} --> {sec_to_timestamp(end, ',')}\n{text}\n\n"
+
+
+class VttSink(TranscriptSink):
+    suffix = ".vtt"
+
+    def header(self):
+        return "WEBVTT\n\n"
+
+    def format(self, start, end, text, words):
+        return f"{sec_to_timestamp(start, '.')} --> {sec_to_timestamp(end, '.')}\n{text}\n\n"
+
+
+class JsonlSink(TranscriptSink):
+    suffix = ".jsonl"
+
+    def format(self, start, end, text, words):
+        record = {"start": start, "end": end, "text": text}
+        if words is not None:
+            record["words"] = [{"start": w_start, "end": w_end, "word": word} for w_start, w_end, word in words]
+        return json.dumps(record, ensure_ascii=False) + "\n"
+
+
+SINK_TYPES = {"txt": TextSink, "srt": SrtSink, "vtt": VttSink, "jsonl": JsonlSink}
+
+
+def open_sinks(mp3_path: Path, formats, checkpoint):
+    offsets = checkpoint.get("offsets", {})
+    count = checkpoint.get("count", 0)
+    sinks = {}
+    for name in formats:
+        # Checkpoints from before the offsets were recorded keep the existing text output
+        offset = None if "last_end" in checkpoint and "offsets" not in checkpoint and name == "txt" else offsets.get(name, 0)
+        sinks[name] = SINK_TYPES[name](mp3_path.with_suffix(SINK_TYPES[name].suffix), offset, count)
+    return sinks
+
+
+def write_checkpoint(checkpoint_path, checkpoint):
+    tmp_path = checkpoint_path.with_name(checkpoint_path.name + ".tmp")
+    with tmp_path.open("w", encoding="utf-8") as f:
+        f.write(json.dumps(checkpoint))
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, checkpoint_path)
+
+
+def iter_new_segments(segments, last_end, with_words=False):
+    """Yield (start, end, text, words) for segments past last_end with non-empty text."""
+    for segment in segments:
+        if segment.end <= last_end:
+            continue
+
+        text = segment.text.strip()
+        if not text:
+            continue
+
+        words = None
+        if with_words and segment.words:
+            words = [(word.start, word.end, word.word) for word in segment.words]
+        yield segment.start, segment.end, text, words
+
+
+def transcribe_resumable_with_timestamps(mp3_path: str, formats=OUTPUT_FORMATS):
     mp3_path = Path(mp3_path)
     checkpoint_path = mp3_path.with_suffix(CHECKPOINT_SUFFIX)
-    output_path = mp3_path.with_suffix(OUTPUT_SUFFIX)
 
     if not mp3_path.exists():
         raise FileNotFoundError(mp3_path)
@@ -25,56 +176,344 @@ def transcribe_resumable_with_timestamps(mp3_path: str):
     # Resume logic
     if checkpoint_path.exists():
         checkpoint = json.loads(checkpoint_path.read_text(encoding="utf-8"))
+        checkpoint.setdefault("count", 0)  # checkpoints from older versions only have last_end
         last_end = checkpoint["last_end"]
         print(f"Resuming from {sec_to_hms(last_end)}")
     else:
-        checkpoint = {"last_end": 0.0}
+        checkpoint = {"last_end": 0.0, "count": 0, "offsets": {}}
         last_end = 0.0
-        output_path.write_text("", encoding="utf-8")
         print("Starting fresh transcription")
 
-    model = WhisperModel(
-        "medium",
-        device="cpu",
-        compute_type="int8"
-    )
+    model = load_model()
+    with_words = "jsonl" in formats
 
     segments, info = model.transcribe(
         str(mp3_path),
-        language="el",
+        language=LANGUAGE,
+        vad_filter=True,
+        beam_size=5,
+        word_timestamps=with_words
+    )
+
+    sinks = open_sinks(mp3_path, formats, checkpoint)
+
+    def save_checkpoint():
+        # Outputs are flushed first so the checkpoint never points past written data
+        checkpoint["offsets"] = {name: sink.flush() for name, sink in sinks.items()}
+        write_checkpoint(checkpoint_path, checkpoint)
+
+    try:
+        unsaved, saved_at = 0, time.monotonic()
+        for start, end, text, words in iter_new_segments(segments, last_end, with_words):
+            for sink in sinks.values():
+                sink.write(start, end, text, words)
+
+            checkpoint["last_end"] = end
+            checkpoint["count"] += 1
+            unsaved += 1
+            if unsaved >= CHECKPOINT_EVERY_SEGMENTS or time.monotonic() - saved_at >= CHECKPOINT_EVERY_SECONDS:
+                save_checkpoint()
+                unsaved, saved_at = 0, time.monotonic()
+        save_checkpoint()
+    finally:
+        for sink in sinks.values():
+            sink.close()
+
+    print("\nTranscription complete.")
+    for sink in sinks.values():
+        print(f"Output: {sink.file.name}")
+    checkpoint_path.unlink(missing_ok=True)
+
+
+def plan_chunks(audio):
+    """Group VAD speech regions into chunks of about CHUNK_SECONDS, as (start, end) sample offsets."""
+    speech = get_speech_timestamps(audio, VadOptions())
+    chunk_samples = CHUNK_SECONDS * SAMPLING_RATE
+    chunks = []
+    start = None
+    for region in speech:
+        if start is None:
+            start = region["start"]
+        if region["end"] - start >= chunk_samples:
+            chunks.append((start, region["end"]))
+            start = None
+    if start is not None:
+        chunks.append((start, speech[-1]["end"]))
+    return chunks
+
+
+def transcribe_chunk(audio, offset):
+    """Transcribe one chunk in a worker process; returns (start, end, text) in file time."""
+    segments, _ = load_model().transcribe(
+        audio,
+        language=LANGUAGE,
         vad_filter=True,
         beam_size=5
     )
+    return [
+        (offset + segment.start, offset + segment.end, segment.text.strip())
+        for segment in segments
+        if segment.text.strip()
+    ]
+
 
-    with output_path.open("a", encoding="utf-8") as out:
-        for segment in segments:
-            if segment.end <= last_end:
-                continue
+def transcribe_parallel_with_timestamps(mp3_path: str, workers: int = WORKERS, formats=OUTPUT_FORMATS):
+    """Transcribe VAD-aligned chunks across a process pool, one model per worker.
 
-            text = segment.text.strip()
-            if not text:
-                continue
+    Finished chunks are kept in the checkpoint, so a resumed run only transcribes
+    the chunks that are still missing.
+    """
+    mp3_path = Path(mp3_path)
+    checkpoint_path = mp3_path.with_suffix(CHUNKS_CHECKPOINT_SUFFIX)
 
-            start_ts = sec_to_hms(segment.start)
-            end_ts = sec_to_hms(segment.end)
+    if not mp3_path.exists():
+        raise FileNotFoundError(mp3_path)
 
-            out.write(f"[{start_ts} → {end_ts}] {text}\n")
-            out.flush()
+    audio = decode_audio(str(mp3_path), sampling_rate=SAMPLING_RATE)
 
-            checkpoint["last_end"] = segment.end
-            checkpoint_path.write_text(
-                json.dumps(checkpoint),
-                encoding="utf-8"
-            )
+    # Resume logic: chunk boundaries are stored so they match across runs
+    if checkpoint_path.exists():
+        checkpoint = json.loads(checkpoint_path.read_text(encoding="utf-8"))
+        print(f"Resuming: {len(checkpoint['done'])}/{len(checkpoint['chunks'])} chunks done")
+    else:
+        checkpoint = {"chunks": plan_chunks(audio), "done": {}}
+        write_checkpoint(checkpoint_path, checkpoint)
+        print(f"Starting fresh transcription in {len(checkpoint['chunks'])} chunks")
+
+    pending = [
+        index for index in range(len(checkpoint["chunks"]))
+        if str(index) not in checkpoint["done"]
+    ]
+    cpu_threads = max(1, (os.cpu_count() or 1) // workers)
+
+    with ProcessPoolExecutor(max_workers=workers, initializer=load_model, initargs=(cpu_threads,)) as executor:
+        futures = {}
+        for index in pending:
+            start, end = checkpoint["chunks"][index]
+            futures[executor.submit(transcribe_chunk, audio[start:end], start / SAMPLING_RATE)] = index
+
+        failure = None
+        for future in as_completed(futures):
+            index = futures[future]
+            try:
+                checkpoint["done"][str(index)] = future.result()
+            except Exception as error:
+                failure = index, error
+                break
+            write_checkpoint(checkpoint_path, checkpoint)
+            print(f"Chunk {len(checkpoint['done'])}/{len(checkpoint['chunks'])} done")
+
+        if failure:
+            # Drop the chunks no worker has started, keep the ones that were already running
+            executor.shutdown(cancel_futures=True)
+            for future, index in futures.items():
+                if future.done() and not future.cancelled() and future.exception() is None:
+                    checkpoint["done"][str(index)] = future.result()
+            write_checkpoint(checkpoint_path, checkpoint)
+            index, error = failure
+            raise RuntimeError(
+                f"Chunk {index} failed, {len(checkpoint['done'])}/{len(checkpoint['chunks'])} chunks "
+                f"kept in {checkpoint_path}: {error}"
+            ) from error
+
+    sinks = open_sinks(mp3_path, formats, {})
+    try:
+        for index in range(len(checkpoint["chunks"])):
+            for start, end, text in checkpoint["done"][str(index)]:
+                for sink in sinks.values():
+                    sink.write(start, end, text)
+    finally:
+        for sink in sinks.values():
+            sink.close()
 
     print("\nTranscription complete.")
-    print(f"Output: {output_path}")
+    for sink in sinks.values():
+        print(f"Output: {sink.file.name}")
     checkpoint_path.unlink(missing_ok=True)
 
 
+def file_hash(path: Path) -> str:
+    digest = hashlib.sha256()
+    with path.open("rb") as f:
+        for block in iter(lambda: f.read(1024 * 1024), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def audio_duration(path: Path):
+    """Duration in seconds from the container header, or None when it can't be read."""
+    try:
+        import av
+        with av.open(str(path)) as container:
+            return container.duration / av.time_base
+    except Exception:
+        return None
+
+
+class JobQueue:
+    """SQLite job table: one row per audio file with status pending/running/done/failed."""
+
+    def __init__(self, db_path: Path):
+        self.connection = sqlite3.connect(db_path)
+        self.connection.execute(
+            "CREATE TABLE IF NOT EXISTS jobs ("
+            "path TEXT PRIMARY KEY, hash TEXT, size INTEGER, mtime INTEGER, duration REAL, "
+            "status TEXT, progress REAL, error TEXT, updated REAL)"
+        )
+        # Jobs that were running when the previous run died start again (from their checkpoint)
+        with self.connection:
+            self.connection.execute("UPDATE jobs SET status = 'pending' WHERE status = 'running'")
+
+    def set_status(self, path, status, progress=None, error=None):
+        with self.connection:
+            self.connection.execute(
+                "UPDATE jobs SET status = ?, progress = COALESCE(?, progress), error = ?, updated = ? WHERE path = ?",
+                (status, progress, error, time.time(), str(path)),
+            )
+
+    def add(self, path: Path, formats):
+        """Register a file; unchanged finished files and known content are skipped."""
+        stat = path.stat()
+        row = self.connection.execute(
+            "SELECT hash, size, mtime, status FROM jobs WHERE path = ?", (str(path),)
+        ).fetchone()
+        outputs = [path.with_suffix(SINK_TYPES[name].suffix) for name in formats]
+
+        # Only re-hash files whose size or mtime changed
+        if row and (row[1], row[2]) == (stat.st_size, stat.st_mtime_ns):
+            content_hash = row[0]
+            if row[3] == "done" and all(output.exists() for output in outputs):
+                return
+        else:
+            content_hash = file_hash(path)
+            if row and row[0] != content_hash:
+                # The audio changed, so an old checkpoint no longer applies
+                path.with_suffix(CHECKPOINT_SUFFIX).unlink(missing_ok=True)
+            elif row and row[3] == "done" and all(output.exists() for output in outputs):
+                # Touched or copied back with the same content: still done
+                with self.connection:
+                    self.connection.execute(
+                        "UPDATE jobs SET size = ?, mtime = ? WHERE path = ?", (stat.st_size, stat.st_mtime_ns, str(path))
+                    )
+                return
+
+        # Same audio already transcribed under another name: reuse its outputs
+        done = self.connection.execute(
+            "SELECT path FROM jobs WHERE hash = ? AND status = 'done' AND path != ?", (content_hash, str(path))
+        ).fetchone()
+        status = "pending"
+        if done:
+            source = Path(done[0])
+            source_outputs = [source.with_suffix(SINK_TYPES[name].suffix) for name in formats]
+            if all(output.exists() for output in source_outputs):
+                for source_output, output in zip(source_outputs, outputs):
+                    shutil.copyfile(source_output, output)
+                status = "done"
+
+        with self.connection:
+            self.connection.execute(
+                "INSERT OR REPLACE INTO jobs VALUES (?, ?, ?, ?, ?, ?, ?, NULL, ?)",
+                (str(path), content_hash, stat.st_size, stat.st_mtime_ns, audio_duration(path),
+                 status, 1.0 if status == "done" else 0.0, time.time()),
+            )
+
+    def pending(self):
+        # Longest files first so the last job doesn't leave the other workers idle;
+        # files without a known duration come last, largest first
+        rows = self.connection.execute(
+            "SELECT path, duration FROM jobs WHERE status = 'pending' "
+            "ORDER BY duration IS NULL, duration DESC, size DESC"
+        ).fetchall()
+        return [(Path(path), duration) for path, duration in rows]
+
+    def summary(self):
+        return dict(self.connection.execute("SELECT status, COUNT(*) FROM jobs GROUP BY status").fetchall())
+
+    def close(self):
+        self.connection.close()
+
+
+def find_audio_files(source: str):
+    if os.path.isdir(source):
+        paths = (os.path.join(source, name) for name in os.listdir(source))
+    else:
+        paths = glob.glob(source)
+    return sorted(Path(path).resolve() for path in paths if path.lower().endswith(AUDIO_EXTENSIONS))
+
+
+def transcribe_batch(source: str, workers: int = WORKERS, formats=OUTPUT_FORMATS):
+    """Transcribe every audio file of a directory or glob with a persistent job queue.
+
+    Each worker process loads the model once and keeps it for all its files;
+    an interrupted batch resumes where it stopped when run again.
+    """
+    audio_files = find_audio_files(source)
+    if not audio_files:
+        print(f"No audio files found in {source}")
+        return
+
+    queue = JobQueue(audio_files[0].parent / JOBS_DB_NAME)
+    try:
+        for path in audio_files:
+            queue.add(path, formats)
+        jobs = queue.pending()
+        print(f"{len(jobs)} of {len(audio_files)} files to transcribe")
+
+        cpu_threads = max(1, (os.cpu_count() or 1) // workers)
+        with ProcessPoolExecutor(max_workers=workers, initializer=load_model, initargs=(cpu_threads,)) as executor:
+            # Jobs are handed out as workers free up, so "running" means a worker has the file
+            job_iter = iter(jobs)
+            running = {}
+            while True:
+                for path, duration in islice(job_iter, workers - len(running)):
+                    running[executor.submit(transcribe_resumable_with_timestamps, str(path), formats)] = (path, duration)
+                    queue.set_status(path, "running")
+                if not running:
+                    break
+
+                finished, _ = wait(running, timeout=PROGRESS_INTERVAL, return_when=FIRST_COMPLETED)
+                for future in finished:
+                    path, _ = running.pop(future)
+                    try:
+                        future.result()
+                        queue.set_status(path, "done", progress=1.0)
+                    except Exception as e:
+                        print(f"Failed to transcribe {path}: {e}")
+                        queue.set_status(path, "failed", error=str(e))
+
+                # Progress of running jobs comes from their checkpoints
+                for path, duration in running.values():
+                    if not duration:
+                        continue
+                    checkpoint_path = path.with_suffix(CHECKPOINT_SUFFIX)
+                    try:
+                        last_end = json.loads(checkpoint_path.read_text(encoding="utf-8"))["last_end"]
+                        queue.set_status(path, "running", progress=min(1.0, last_end / duration))
+                    except (OSError, ValueError, KeyError):
+                        continue
+
+        print(f"Batch complete: {queue.summary()}")
+    finally:
+        queue.close()
+
+
 if __name__ == "__main__":
     if len(sys.argv) < 2:
-        print("Usage: python gr_transcriber_timestamps.py audio.mp3")
+        print("Usage: python gr_transcriber_timestamps.py audio.mp3|folder|'*.mp3' "
+              "[--parallel] [--formats=txt,srt,vtt,jsonl] [--workers=N]")
         sys.exit(1)
 
-    transcribe_resumable_with_timestamps(sys.argv[1])
+    formats = OUTPUT_FORMATS
+    workers = WORKERS
+    for arg in sys.argv[2:]:
+        if arg.startswith("--formats="):
+            formats = tuple(arg.split("=", 1)[1].split(","))
+        elif arg.startswith("--workers="):
+            workers = int(arg.split("=", 1)[1])
+
+    if os.path.isdir(sys.argv[1]) or glob.has_magic(sys.argv[1]):
+        transcribe_batch(sys.argv[1], workers=workers, formats=formats)
+    elif "--parallel" in sys.argv[2:]:
+        transcribe_parallel_with_timestamps(sys.argv[1], workers=workers, formats=formats)
+    else:
+        transcribe_resumable_with_timestamps(sys.argv[1], formats=formats)
@@ -1,29 +1,289 @@
+import os
+import re
+import json
+import time
+import sqlite3
+import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from html.parser import HTMLParser
+from urllib.parse import urlparse
+
 import requests
-from bs4 import BeautifulSoup
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 from docx import Document
 
-# URL of the HTML page you want to scrape
+# File with the URLs of the HTML pages you want to scrape, one per line
+URLS_FILE = "urls.txt"
+
+# One .docx per page is written here, unless MERGED_OUTPUT names a single document
+OUTPUT_FOLDER = "scraped"
+MERGED_OUTPUT = None  # e.g. "scraped_text.docx"
+
+CONCURRENCY = 8  # pages fetched at the same time
+HOST_DELAY = 1.0  # minimum seconds between two requests to the same host
+RETRIES = 3  # retries on connection errors and 429/5xx responses
+BACKOFF_FACTOR = 0.5  # retry delays grow as 0.5s, 1s, 2s, ...
+TIMEOUT = 30  # seconds
+
+# Pages are revalidated with ETag/Last-Modified and unchanged ones reuse their extracted text
+CACHE_FILE = "page_cache.sqlite"
+CACHE_MAX_BYTES = 200 * 1024 * 1024  # least recently used pages are evicted above this size
+
+# Pages without a charset in the header or a <meta> tag are tried as UTF-8, then as this encoding
+FALLBACK_ENCODING = "windows-1252"
+CHARSET_PATTERN = re.compile(rb"""<meta[^>]+charset\s*=\s*["']?\s*([A-Za-z0-9_.:-]+)""", re.IGNORECASE)
+
+
+# Create a session whose connection pool is shared by all workers
+def create_session(pool_size=CONCURRENCY):
+    retry = Retry(
+        total=RETRIES,
+        backoff_factor=BACKOFF_FACTOR,
+        status_forcelist=(429, 500, 502, 503, 504),
+        respect_retry_after_header=True,
+    )
+    adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size, max_retries=retry)
+    session = requests.Session()
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    return session
+
+
+# Keeps requests to the same host at least `delay` seconds apart
+class HostThrottle:
+    def __init__(self, delay=HOST_DELAY):
+        self.delay = delay
+        self.next_request = {}
+        self.lock = threading.Lock()
+
+    def wait(self, host):
+        with self.lock:
+            now = time.monotonic()
+            slot = max(now, self.next_request.get(host, now))
+            self.next_request[host] = slot + self.delay
+        time.sleep(slot - now)
+
+
+# On-disk cache of extracted page text with the validators needed for conditional requests
+class PageCache:
+    def __init__(self, cache_file=CACHE_FILE, max_bytes=CACHE_MAX_BYTES):
+        self.max_bytes = max_bytes
+        self.revalidated = 0
+        self.lock = threading.Lock()
+        self.connection = sqlite3.connect(cache_file, check_same_thread=False)
+        self.connection.execute(
+            "CREATE TABLE IF NOT EXISTS pages ("
+            "url TEXT PRIMARY KEY, etag TEXT, last_modified TEXT, texts TEXT, size INTEGER, last_used REAL)"
+        )
+
+    # Return (etag, last_modified, texts) for a cached page, or None
+    def get(self, url):
+        with self.lock:
+            row = self.connection.execute(
+                "SELECT etag, last_modified, texts FROM pages WHERE url = ?", (url,)
+            ).fetchone()
+        if row is None:
+            return None
+        etag, last_modified, texts = row
+        return etag, last_modified, json.loads(texts)
+
+    # Mark a cached page as still valid after a 304 response
+    def touch(self, url):
+        with self.lock:
+            self.revalidated += 1
+            self.connection.execute("UPDATE pages SET last_used = ? WHERE url = ?", (time.time(), url))
+
+    def put(self, url, etag, last_modified, texts):
+        texts = json.dumps(texts)
+        with self.lock:
+            self.connection.execute(
+                "INSERT OR REPLACE INTO pages VALUES (?, ?, ?, ?, ?, ?)",
+                (url, etag, last_modified, texts, len(texts), time.time()),
+            )
+
+    # Evict least recently used pages over the size limit and write everything to disk
+    def close(self):
+        with self.lock:
+            self.connection.execute(
+                "DELETE FROM pages WHERE url IN (SELECT url FROM "
+                "(SELECT url, SUM(size) OVER (ORDER BY last_used DESC) AS total FROM pages) WHERE total > ?)",
+                (self.max_bytes,),
+            )
+            self.connection.commit()
+            self.connection.close()
+
+
+# Streaming extractor: collects non-empty text while skipping script/style subtrees
+class TextExtractor(HTMLParser):
+    SKIPPED_TAGS = {"script", "style"}
+
+    def __init__(self):
+        super().__init__()
+        self.texts = []
+        self.skip_depth = 0
+
+    def handle_starttag(self, tag, attrs):
+        if tag in self.SKIPPED_TAGS:
+            self.skip_depth += 1
+
+    def handle_endtag(self, tag):
+        if tag in self.SKIPPED_TAGS and self.skip_depth:
+            self.skip_depth -= 1
+
+    def handle_data(self, data):
+        if not self.skip_depth:
+            text = data.strip()
+            if text:
+                self.texts.append(text)
+
+
+# Charset parameter of a Content-Type header, or None
+def declared_charset(content_type):
+    match = re.search(r"charset\s*=\s*[\"']?([^\s;\"']+)", content_type or "", re.IGNORECASE)
+    return match.group(1) if match else None
+
+
+# Decode page bytes like a browser: byte order mark, header charset, <meta charset>, then UTF-8
+def decode_html(content, encoding=None):
+    candidates = []
+    for bom, bom_encoding in ((b"\xef\xbb\xbf", "utf-8-sig"), (b"\xff\xfe", "utf-16"), (b"\xfe\xff", "utf-16")):
+        if content.startswith(bom):
+            candidates.append(bom_encoding)
+    candidates.append(encoding)
+    match = CHARSET_PATTERN.search(content[:4096])
+    if match:
+        candidates.append(match.group(1).decode("ascii"))
+    candidates.append("utf-8")
+
+    for candidate in candidates:
+        if not candidate:
+            continue
+        try:
+            return content.decode(candidate)
+        except (LookupError, UnicodeDecodeError):
+            continue
+    return content.decode(FALLBACK_ENCODING, errors="replace")
+
+
+# Extract the text of an HTML page as a list of non-empty strings
+def extract_text(content, encoding=None):
+    if isinstance(content, bytes):
+        content = decode_html(content, encoding)
+    extractor = TextExtractor()
+    extractor.feed(content)
+    extractor.close()
+    return extractor.texts
+
+
+# Previous extraction path through a full BeautifulSoup tree, kept for comparison
+def extract_text_soup(content):
+    from bs4 import BeautifulSoup
+
+    # Create a BeautifulSoup object to parse the HTML
+    soup = BeautifulSoup(content, "html.parser")
+
+    # Find all text elements in the HTML
+    text_elements = soup.find_all(text=True)
+
+    # Filter out unwanted elements, such as scripts and styles
+    return [element.strip() for element in text_elements if element.parent.name not in ["script", "style"]]
+
+
+# Download a page and extract its text; errors are returned instead of raised
+def fetch_text(session, throttle, url, cache=None):
+    try:
+        cached = cache.get(url) if cache is not None else None
+        headers = {}
+        if cached is not None:
+            etag, last_modified, _ = cached
+            if etag:
+                headers["If-None-Match"] = etag
+            if last_modified:
+                headers["If-Modified-Since"] = last_modified
+
+        throttle.wait(urlparse(url).netloc)
+        response = session.get(url, headers=headers, timeout=TIMEOUT)
+
+        # Unchanged page: skip both the download and the parse
+        if response.status_code == 304 and cached is not None:
+            cache.touch(url)
+            return url, cached[2], None
+
+        response.raise_for_status()
+        # Decode the bytes ourselves; requests assumes ISO-8859-1 for text/html without a charset
+        texts = extract_text(response.content, declared_charset(response.headers.get("Content-Type")))
+        etag, last_modified = response.headers.get("ETag"), response.headers.get("Last-Modified")
+        if cache is not None and (etag or last_modified):
+            cache.put(url, etag, last_modified, texts)
+        return url, texts, None
+    except Exception as e:
+        return url, None, f"{type(e).__name__}: {e}"
+
+
+# Fetch pages concurrently, yielding (url, texts, error) in input order
+def crawl(urls, concurrency=CONCURRENCY, cache=None):
+    session = create_session(concurrency)
+    throttle = HostThrottle()
+    pending = deque()
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        for url in urls:
+            # Keep a bounded window of pages in flight so results stream out
+            if len(pending) >= concurrency * 2:
+                yield pending.popleft().result()
+            pending.append(executor.submit(fetch_text, session, throttle, url, cache))
+        while pending:
+            yield pending.popleft().result()
+
+
+# Build a file name for a page's document from its position and URL
+def output_filename(index, url):
+    parsed = urlparse(url)
+    slug = re.sub(r"[^A-Za-z0-9]+", "_", parsed.netloc + parsed.path).strip("_")[:80]
+    return f"{index:05d}_{slug or 'page'}.docx"
+
+
+# Write the text of every page into .docx files, returning the URLs that failed
+def scrape_urls(urls, output_folder=OUTPUT_FOLDER, merged_output=MERGED_OUTPUT, concurrency=CONCURRENCY,
+                cache=None):
+    failed_urls = []
+    merged_document = Document() if merged_output else None
+    if not merged_output:
+        os.makedirs(output_folder, exist_ok=True)
 
-url = ""
+    for index, (url, texts, error) in enumerate(crawl(urls, concurrency, cache), start=1):
+        if error:
+            print(f"Failed to scrape {url}: {error}")
+            failed_urls.append((url, error))
+            continue
 
-# Send a GET request to the URL
-response = requests.get(url)
+        if merged_document is not None:
+            merged_document.add_heading(url, level=1)
+            document = merged_document
+        else:
+            document = Document()
 
-# Create a BeautifulSoup object to parse the HTML
-soup = BeautifulSoup(response.content, "html.parser")
+        # Add the extracted text to the Word document
+        for text in texts:
+            document.add_paragraph(text)
 
-# Find all text elements in the HTML
-text_elements = soup.find_all(text=True)
+        if merged_document is None:
+            document.save(os.path.join(output_folder, output_filename(index, url)))
+        print(f"Scraped {url}")
 
-# Filter out unwanted elements, such as scripts and styles
-filtered_text = [element.strip() for element in text_elements if element.parent.name not in ["script", "style"]]
+    if merged_document is not None:
+        merged_document.save(merged_output)
+    return failed_urls
 
-# Create a new Word document
-document = Document()
 
-# Add the extracted text to the Word document
-for text in filtered_text:
-    document.add_paragraph(text)
+if __name__ == "__main__":
+    with open(URLS_FILE, encoding="utf-8") as urls_file:
+        urls = [line.strip() for line in urls_file if line.strip() and not line.startswith("#")]
 
-# Save the Word document
-document.save("scraped_text.docx")
+    cache = PageCache()
+    try:
+        failed_urls = scrape_urls(urls, cache=cache)
+    finally:
+        cache.close()
+    print(f"Scraped {len(urls) - len(failed_urls)} of {len(urls)} pages, {cache.revalidated} unchanged.")
@@ -1,29 +1,237 @@
+import os
+import re
+import json
+import hashlib
 import PyPDF2
 import openpyxl
+from datetime import date, datetime
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor
+from itertools import groupby
+
+PAGES_PER_TASK = 16  # pages extracted per worker task
+TASKS_AHEAD_PER_WORKER = 4  # folder mode: page ranges queued per worker while workbooks are written
+
+# Statement line layouts per bank: regex with date/description/amount(/balance) groups,
+# the date format and the decimal separator used for amounts.
+# Amounts may be written with thousands separators ("1.200,00") or without ("1200,00")
+STATEMENT_LAYOUTS = {
+    "de": {
+        "pattern": re.compile(
+            r"^(?P<date>\d{2}\.\d{2}\.\d{4})\s+(?P<description>.+?)\s+"
+            r"(?P<amount>[+-]?(?:\d{1,3}(?:\.\d{3})+|\d+),\d{2}-?)(?:\s+(?P<balance>[+-]?(?:\d{1,3}(?:\.\d{3})+|\d+),\d{2}-?))?$"
+        ),
+        "date_format": "%d.%m.%Y",
+        "decimal": ",",
+    },
+    "en": {
+        "pattern": re.compile(
+            r"^(?P<date>\d{2}/\d{2}/\d{4})\s+(?P<description>.+?)\s+"
+            r"(?P<amount>[+-]?(?:\d{1,3}(?:,\d{3})+|\d+)\.\d{2}-?)(?:\s+(?P<balance>[+-]?(?:\d{1,3}(?:,\d{3})+|\d+)\.\d{2}-?))?$"
+        ),
+        "date_format": "%m/%d/%Y",
+        "decimal": ".",
+    },
+}
+STATEMENT_HEADERS = ["Date", "Description", "Amount", "Balance"]
+STATEMENT_CACHE_FILE = 'statement_cache.json'  # parsed rows per page content hash
+
+# Function to yield the text of each page of a PDF file
+def iter_pdf_pages(pdf_filename, start=0, stop=None):
+    with open(pdf_filename, 'rb') as pdf_file:
+        pdf_reader = PyPDF2.PdfReader(pdf_file)
+        for page in pdf_reader.pages[start:stop]:
+            yield page.extract_text() or ""
 
 # Function to extract text from a PDF file
 def extract_text_from_pdf(pdf_filename):
-    text = ""
+    return "".join(iter_pdf_pages(pdf_filename))
+
+# Function to extract a range of pages, run inside a worker process
+def extract_page_range(page_range):
+    pdf_filename, start, stop = page_range
+    return list(iter_pdf_pages(pdf_filename, start, stop))
+
+# Function to extract a range of pages in a worker process; returns (pdf_filename, page_texts, error)
+def extract_page_range_safe(page_range):
+    try:
+        return page_range[0], extract_page_range(page_range), None
+    except Exception as e:
+        return page_range[0], None, f"{type(e).__name__}: {e}"
+
+# Function to split a PDF into (pdf_filename, start, stop) page ranges, at least one per file
+def split_page_ranges(pdf_filename, pages_per_task=PAGES_PER_TASK):
     with open(pdf_filename, 'rb') as pdf_file:
-        pdf_reader = PyPDF2.PdfReader(pdf_file)
-        for page in pdf_reader.pages:
-            text += page.extract_text()
-    return text
+        page_count = len(PyPDF2.PdfReader(pdf_file).pages)
+    return [
+        (pdf_filename, start, min(start + pages_per_task, page_count))
+        for start in range(0, max(page_count, 1), pages_per_task)
+    ]
+
+# Function to yield page texts in order while the pages are extracted by a process pool
+def iter_pdf_pages_parallel(pdf_filename, executor, pages_per_task=PAGES_PER_TASK):
+    for page_texts in executor.map(extract_page_range, split_page_ranges(pdf_filename, pages_per_task)):
+        yield from page_texts
+
+# Function to yield (pdf_filename, page_texts, error) in order for the page ranges of many files.
+# Up to `window` ranges are queued ahead, so the pool keeps working on the next files
+# while the caller writes the current one. Errors are returned instead of raised
+def iter_page_ranges_parallel(pdf_filenames, executor, window, pages_per_task=PAGES_PER_TASK):
+    pending = deque()
+    for pdf_filename in pdf_filenames:
+        try:
+            page_ranges = split_page_ranges(pdf_filename, pages_per_task)
+        except Exception as e:
+            # Unreadable file: its error takes its place in the result order
+            failed = Future()
+            failed.set_result((pdf_filename, None, f"{type(e).__name__}: {e}"))
+            pending.append(failed)
+            continue
+        for page_range in page_ranges:
+            if len(pending) >= window:
+                yield pending.popleft().result()
+            pending.append(executor.submit(extract_page_range_safe, page_range))
+    while pending:
+        yield pending.popleft().result()
+
+# Function to split page texts into lines
+def iter_lines(page_texts):
+    for text in page_texts:
+        yield from text.split('\n')
+
+# Function to stream lines into an XLSX file, one line per row in column A
+def save_lines_to_xlsx(lines, xlsx_filename):
+    workbook = openpyxl.Workbook(write_only=True)
+    sheet = workbook.create_sheet()
+    for line in lines:
+        sheet.append([line])
+    workbook.save(xlsx_filename)
 
 # Function to save text to an XLSX file
 def save_text_to_xlsx(text, xlsx_filename):
-    workbook = openpyxl.Workbook()
-    sheet = workbook.active
-    lines = text.split('\n')
-    for row_num, line in enumerate(lines, start=1):
-        sheet.cell(row=row_num, column=1, value=line)
+    save_lines_to_xlsx(text.split('\n'), xlsx_filename)
+
+# Function to yield the page texts of one file's results, raising on the first failed range
+def iter_result_pages(file_results):
+    for _, page_texts, error in file_results:
+        if error:
+            raise RuntimeError(error)
+        yield from page_texts
+
+# Function to convert every PDF in a folder to an XLSX file of the same name, returning the failed files.
+# Page ranges of all files share one pool, so small PDFs run side by side and
+# extraction continues while workbooks are written
+def convert_pdf_folder(pdf_folder, output_folder, workers=None, pages_per_task=PAGES_PER_TASK):
+    os.makedirs(output_folder, exist_ok=True)
+    names = sorted(name for name in os.listdir(pdf_folder) if name.lower().endswith('.pdf'))
+    pdf_filenames = [os.path.join(pdf_folder, name) for name in names]
+    window = TASKS_AHEAD_PER_WORKER * (workers or os.cpu_count() or 1)
+    failed_files = []
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        results = iter_page_ranges_parallel(pdf_filenames, executor, window, pages_per_task)
+        for pdf_filename, file_results in groupby(results, key=lambda result: result[0]):
+            name = os.path.basename(pdf_filename)
+            xlsx_filename = os.path.join(output_folder, os.path.splitext(name)[0] + '.xlsx')
+            try:
+                # A write-only workbook only touches the file on save, so a failed PDF leaves no xlsx
+                save_lines_to_xlsx(iter_lines(iter_result_pages(file_results)), xlsx_filename)
+            except Exception as e:
+                print(f"Failed to convert {pdf_filename}: {e}")
+                failed_files.append((pdf_filename, str(e)))
+                continue
+            print(f"Text extracted from {pdf_filename} and saved to {xlsx_filename}.")
+    return failed_files
+
+# Function to convert an amount like "1.234,56-" into a float
+def parse_amount(value, decimal):
+    if value is None:
+        return None
+    thousands = "." if decimal == "," else ","
+    value = value.replace(thousands, "").replace(decimal, ".")
+    if value.endswith("-"):
+        value = "-" + value[:-1]
+    return float(value)
+
+# Function to parse the statement lines of one page into (date, description, amount, balance) rows
+def parse_statement_page(text, layout):
+    rows = []
+    for line in text.split('\n'):
+        match = layout["pattern"].match(line.strip())
+        if match:
+            rows.append((
+                datetime.strptime(match["date"], layout["date_format"]).date(),
+                match["description"],
+                parse_amount(match["amount"], layout["decimal"]),
+                parse_amount(match["balance"], layout["decimal"]),
+            ))
+    return rows
+
+# Cache of parsed statement rows keyed by layout and a hash of the raw page content
+class StatementCache:
+    def __init__(self, cache_filename=STATEMENT_CACHE_FILE):
+        self.cache_filename = cache_filename
+        self.pages = {}
+        if os.path.exists(cache_filename):
+            with open(cache_filename, 'r', encoding='utf-8') as cache_file:
+                self.pages = json.load(cache_file)
+
+    @staticmethod
+    def page_key(page, layout_name):
+        contents = page.get_contents()
+        data = contents.get_data() if contents is not None else b""
+        return f"{layout_name}:{hashlib.sha1(data).hexdigest()}"
+
+    def get(self, key):
+        rows = self.pages.get(key)
+        if rows is None:
+            return None
+        return [(date.fromisoformat(day), description, amount, balance) for day, description, amount, balance in rows]
+
+    def put(self, key, rows):
+        self.pages[key] = [(day.isoformat(), description, amount, balance) for day, description, amount, balance in rows]
+
+    def save(self):
+        tmp_filename = self.cache_filename + '.tmp'
+        with open(tmp_filename, 'w', encoding='utf-8') as cache_file:
+            json.dump(self.pages, cache_file)
+        os.replace(tmp_filename, self.cache_filename)
+
+# Function to yield typed statement rows; pages already in the cache are not re-extracted
+def iter_statement_rows(pdf_filename, layout_name="de", cache=None):
+    layout = STATEMENT_LAYOUTS[layout_name]
+    with open(pdf_filename, 'rb') as pdf_file:
+        pdf_reader = PyPDF2.PdfReader(pdf_file)
+        for page in pdf_reader.pages:
+            key = StatementCache.page_key(page, layout_name) if cache is not None else None
+            rows = cache.get(key) if cache is not None else None
+            if rows is None:
+                rows = parse_statement_page(page.extract_text() or "", layout)
+                if cache is not None:
+                    cache.put(key, rows)
+            yield from rows
+
+# Function to save statement rows to an XLSX file with typed columns
+def save_statement_to_xlsx(rows, xlsx_filename):
+    workbook = openpyxl.Workbook(write_only=True)
+    sheet = workbook.create_sheet()
+    sheet.append(STATEMENT_HEADERS)
+    for row in rows:
+        sheet.append(list(row))
     workbook.save(xlsx_filename)
 
-# Example usage
-pdf_filename = 'q1kontoauszug.pdf'  # Replace with your PDF file
-xlsx_filename = 'pdf.xlsx'  # Replace with the desired output XLSX file
+if __name__ == "__main__":
+    # Example usage
+    pdf_filename = 'q1kontoauszug.pdf'  # Replace with your PDF file
+    xlsx_filename = 'pdf.xlsx'  # Replace with the desired output XLSX file
+
+    save_lines_to_xlsx(iter_lines(iter_pdf_pages(pdf_filename)), xlsx_filename)
+
+    print(f"Text extracted from {pdf_filename} and saved to {xlsx_filename}.")
 
-extracted_text = extract_text_from_pdf(pdf_filename)
-save_text_to_xlsx(extracted_text, xlsx_filename)
+    # For whole folders of statements, pages are spread across all CPU cores:
+    # convert_pdf_folder('statements', 'statements_xlsx')
 
-print(f"Text extracted from {pdf_filename} and saved to {xlsx_filename}.")
+    # Statement mode: date/description/amount/balance columns, unchanged pages come from the cache
+    # cache = StatementCache()
+    # save_statement_to_xlsx(iter_statement_rows(pdf_filename, "de", cache), 'statement.xlsx')
+    # cache.save()
@@ -1,5 +1,6 @@
 import os
 from pathlib import Path
+from media_index import MediaIndex
 
 """deletes empty folders"""
 
@@ -9,28 +10,40 @@ ROOT_FOLDER = "icloud"
 DRY_RUN = False  # Set to False to actually delete
 
 # ---------------- MAIN ----------------
-def delete_empty_folders(path):
-    path = Path(path)
+def delete_empty_folders(path, index):
+    index.refresh(path)
     deleted_folders = []
 
-    # Walk the directory tree from the bottom up
-    for folder in sorted(path.rglob('*'), key=lambda p: -p.parts.__len__()):
-        if folder.is_dir():
-            try:
-                if not any(folder.iterdir()):  # folder is empty
-                    if DRY_RUN:
-                        print(f"[DRY-RUN] Would delete: {folder}")
-                    else:
-                        folder.rmdir()
-                        print(f"Deleted: {folder}")
-                        deleted_folders.append(folder)
-            except Exception as e:
-                print(f"Failed to delete {folder}: {e}")
+    # A folder is empty when no indexed file lies below it
+    non_empty = set()
+    for media_file in index.files(path):
+        parent = os.path.dirname(media_file.path)
+        while parent not in non_empty and parent != os.path.dirname(parent):
+            non_empty.add(parent)
+            parent = os.path.dirname(parent)
+
+    # Deepest folders first, so parents emptied by this run go too
+    for folder in index.folders(path):
+        if folder in non_empty:
+            continue
+        folder = Path(folder)
+        try:
+            if DRY_RUN:
+                print(f"[DRY-RUN] Would delete: {folder}")
+            else:
+                folder.rmdir()
+                index.remove(folder)
+                print(f"Deleted: {folder}")
+                deleted_folders.append(folder)
+        except Exception as e:
+            print(f"Failed to delete {folder}: {e}")
 
     return deleted_folders
 
 # ---------------- EXECUTE ----------------
-deleted = delete_empty_folders(ROOT_FOLDER)
+index = MediaIndex()
+deleted = delete_empty_folders(ROOT_FOLDER, index)
+index.close()
 if DRY_RUN:
     print("Dry-run completed. No folders were deleted.")
 else:
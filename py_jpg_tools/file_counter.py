@@ -1,5 +1,4 @@
-import os
-from pathlib import Path
+from media_index import MediaIndex
 
 
 """counts files in a folder"""
@@ -8,13 +7,12 @@ FOLDER_PATH = "icloud"
 RECURSIVE = True  # Set to False to only count files in the top-level folder
 
 # ---------------- MAIN ----------------
-def count_files(folder_path, recursive=True):
-    folder = Path(folder_path)
-    if recursive:
-        return sum(1 for _ in folder.rglob('*') if _.is_file())
-    else:
-        return sum(1 for _ in folder.iterdir() if _.is_file())
+def count_files(folder_path, index, recursive=True):
+    index.refresh(folder_path)
+    return len(index.files(folder_path, recursive))
 
 # ---------------- EXECUTE ----------------
-file_count = count_files(FOLDER_PATH, RECURSIVE)
+index = MediaIndex()
+file_count = count_files(FOLDER_PATH, index, RECURSIVE)
+index.close()
 print(f"Total files in '{FOLDER_PATH}': {file_count}")
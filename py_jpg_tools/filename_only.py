@@ -1,5 +1,6 @@
 import os
 from pathlib import Path
+from media_index import MediaIndex
 
 # ---------------- CONFIG ----------------
 INPUT_FOLDER = "icloud"  # change to your folder
@@ -26,39 +27,43 @@ def resolve_duplicate(dest_path):
 
 locked_files = []
 
-for root, _, files in os.walk(INPUT_FOLDER):
-    for file in files:
-        if not file.lower().endswith(SUPPORTED_EXTENSIONS):
-            continue
-
-        src_path = Path(root) / file
-
-        if is_file_locked(src_path):
-            print(f"Locked file skipped: {src_path}")
+index = MediaIndex()
+index.refresh(INPUT_FOLDER)
+
+for media_file in index.files(INPUT_FOLDER):
+    src_path = Path(media_file.path)
+    if not src_path.name.lower().endswith(SUPPORTED_EXTENSIONS):
+        continue
+
+    if is_file_locked(src_path):
+        print(f"Locked file skipped: {src_path}")
+        locked_files.append(str(src_path))
+        continue
+
+    stem = src_path.stem
+    if "IMG" in stem:
+        # keep "IMG" and everything after
+        new_stem = stem.split("IMG", 1)[1]
+        new_stem = "IMG" + new_stem  # prepend IMG back
+        new_stem = new_stem.strip("_- ")  # remove any leading underscores/dashes
+    else:
+        new_stem = stem
+
+    new_filename = f"{new_stem}{src_path.suffix}"
+    dest_path = resolve_duplicate(src_path.parent / new_filename)
+
+    if DRY_RUN:
+        print(f"[DRY-RUN] Rename {src_path.name} -> {new_filename}")
+    else:
+        try:
+            src_path.rename(dest_path)
+            index.rename(src_path, dest_path)
+            print(f"Renamed {src_path.name} -> {new_filename}")
+        except PermissionError:
+            print(f"PermissionError, skipping: {src_path.name}")
             locked_files.append(str(src_path))
-            continue
-
-        stem = src_path.stem
-        if "IMG" in stem:
-            # keep "IMG" and everything after
-            new_stem = stem.split("IMG", 1)[1]
-            new_stem = "IMG" + new_stem  # prepend IMG back
-            new_stem = new_stem.strip("_- ")  # remove any leading underscores/dashes
-        else:
-            new_stem = stem
-
-        new_filename = f"{new_stem}{src_path.suffix}"
-        dest_path = resolve_duplicate(src_path.parent / new_filename)
-
-        if DRY_RUN:
-            print(f"[DRY-RUN] Rename {src_path.name} -> {new_filename}")
-        else:
-            try:
-                src_path.rename(dest_path)
-                print(f"Renamed {src_path.name} -> {new_filename}")
-            except PermissionError:
-                print(f"PermissionError, skipping: {src_path.name}")
-                locked_files.append(str(src_path))
+
+index.close()
 
 if locked_files:
     with open(LOCKED_LOG, "w") as f:
@@ -1,6 +1,7 @@
 import os
 from pathlib import Path
 from unidecode import unidecode
+from media_index import MediaIndex
 
 
 """transliterates all folders names to ascii characters"""
@@ -10,23 +11,25 @@ ROOT_FOLDER = "icloud"
 DRY_RUN = False  # Set to False to actually rename
 
 # ---------------- MAIN ----------------
-def rename_folders_to_english(path):
-    path = Path(path)
-    
-    # Walk from bottom up to rename deepest folders first
-    for folder in sorted(path.rglob('*'), key=lambda p: -len(p.parts)):
-        if folder.is_dir():
-            new_name = unidecode(folder.name).replace(" ", "_")
-            if new_name != folder.name:
-                new_path = folder.parent / new_name
-                if DRY_RUN:
-                    print(f"[DRY-RUN] Rename: {folder} -> {new_path}")
-                else:
-                    try:
-                        folder.rename(new_path)
-                        print(f"Renamed: {folder} -> {new_path}")
-                    except Exception as e:
-                        print(f"Failed to rename {folder}: {e}")
+def rename_folders_to_english(path, index):
+    index.refresh(path)
+
+    # Deepest folders first, so parent paths are still valid when children are renamed
+    for folder in map(Path, index.folders(path)):
+        new_name = unidecode(folder.name).replace(" ", "_")
+        if new_name != folder.name:
+            new_path = folder.parent / new_name
+            if DRY_RUN:
+                print(f"[DRY-RUN] Rename: {folder} -> {new_path}")
+            else:
+                try:
+                    folder.rename(new_path)
+                    index.rename(folder, new_path)
+                    print(f"Renamed: {folder} -> {new_path}")
+                except Exception as e:
+                    print(f"Failed to rename {folder}: {e}")
 
 # ---------------- EXECUTE ----------------
-rename_folders_to_english(ROOT_FOLDER)
+index = MediaIndex()
+rename_folders_to_english(ROOT_FOLDER, index)
+index.close()
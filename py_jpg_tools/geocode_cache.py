@@ -0,0 +1,62 @@
+import json
+import sqlite3
+
+"""
+Geocode Cache: reverse geocoding results on disk, keyed by rounded coordinates
+
+Photos from the same trip share nearly identical coordinates, so the
+coordinates are rounded to PRECISION decimals (3 decimals is roughly a
+110 m cell) and every cell is geocoded only once. The cache is shared by
+mass_renamer and photo_geo_sorting and survives between runs; only cache
+misses reach the network and pay Nominatim's politeness sleep.
+
+"No address found" answers are cached too; failed requests are not.
+"""
+
+# ---------------- CONFIG ----------------
+CACHE_FILE = "geocode_cache.sqlite"
+PRECISION = 3  # decimals kept from lat/lon
+
+class GeocodeCache:
+    def __init__(self, cache_file=CACHE_FILE, precision=PRECISION):
+        self.precision = precision
+        self.hits = 0
+        self.misses = 0
+        self.connection = sqlite3.connect(cache_file)
+        self.connection.execute(
+            "CREATE TABLE IF NOT EXISTS geocode ("
+            "precision INTEGER, lat INTEGER, lon INTEGER, address TEXT, "
+            "PRIMARY KEY (precision, lat, lon))"
+        )
+
+    def key(self, lat, lon):
+        scale = 10 ** self.precision
+        return self.precision, round(lat * scale), round(lon * scale)
+
+    def lookup(self, lat, lon, fetch):
+        """Cached address for the cell around (lat, lon); on a miss call fetch(lat, lon) and store it"""
+        key = self.key(lat, lon)
+        row = self.connection.execute(
+            "SELECT address FROM geocode WHERE precision = ? AND lat = ? AND lon = ?", key
+        ).fetchone()
+        if row:
+            self.hits += 1
+            return json.loads(row[0])
+
+        self.misses += 1
+        address = fetch(lat, lon)  # exceptions propagate and nothing is stored
+        with self.connection:
+            self.connection.execute(
+                "INSERT OR REPLACE INTO geocode VALUES (?, ?, ?, ?)", (*key, json.dumps(address, ensure_ascii=False))
+            )
+        return address
+
+    def hit_rate(self):
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+    def summary(self):
+        return f"Geocode cache: {self.hits} hits, {self.misses} misses ({self.hit_rate():.1%} hit rate)"
+
+    def close(self):
+        self.connection.close()
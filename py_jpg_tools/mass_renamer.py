@@ -1,12 +1,13 @@
 import os
 from pathlib import Path
-from PIL import Image
-from PIL.ExifTags import TAGS
 from geopy.geocoders import Nominatim
 from datetime import datetime
 import time
 from unidecode import unidecode
 import re
+from media_index import MediaIndex
+from offline_geocoder import open_geocoder
+from geocode_cache import GeocodeCache
 
 """
 Photo Filename Organizer: originalfilename_coordinates_streetname_timestamp
@@ -17,7 +18,11 @@ and its subfolders. For each supported file (png, mp4, jpg, jpeg, gif, mov):
 1. Keeps the original filename, cleaned of any previously appended
    coordinates/street/timestamp blocks to avoid stacking on repeated runs.
 2. Extracts GPS coordinates from the photo's EXIF metadata (if available).
-3. Uses Nominatim geolocation to get street and suburb/neighbourhood names.
+3. Looks up street and suburb/neighbourhood names in the local offline
+   geocoder index (see offline_geocoder.py), falling back to Nominatim when
+   no index is built or no nearby place is found. Nominatim answers are
+   cached per ~100 m cell (see geocode_cache.py), so only new places wait
+   for the polite 1 second pause.
 4. Extracts the photo's timestamp from EXIF (DateTimeOriginal or DateTime), 
    or falls back to the file modification time if missing.
 5. Builds a new filename in the format:
@@ -29,6 +34,8 @@ and its subfolders. For each supported file (png, mp4, jpg, jpeg, gif, mov):
 9. Skips locked or in-use files and logs them to a text file.
 10. Folder names are never modified; only file names are renamed.
 11. DRY_RUN mode can be enabled to preview changes without actually renaming.
+12. Files, EXIF timestamps and GPS coordinates come from the shared media index,
+    so only new or changed files are opened on repeated runs.
 
 Configuration:
 - INPUT_FOLDER: path to the folder containing files to process.
@@ -36,6 +43,7 @@ Configuration:
 - LOCKED_LOG: path to a log file for locked files.
 - SUPPORTED_EXTENSIONS: tuple of file extensions to process.
 - MAX_FILENAME_LEN: maximum filename length for safety on Windows.
+- USE_NOMINATIM: query Nominatim when the offline index has no answer.
 """
 
 # ---------------- CONFIG ----------------
@@ -44,70 +52,54 @@ DRY_RUN = False
 LOCKED_LOG = "locked_files.txt"
 SUPPORTED_EXTENSIONS = ("png", "mp4", ".jpg", ".jpeg", ".gif", ".mov")
 MAX_FILENAME_LEN = 150  # Windows-safe max length
+USE_NOMINATIM = True
 
 geolocator = Nominatim(user_agent="photo_renamer")
+offline_geocoder = open_geocoder()  # None until an index has been built
+geocode_cache = GeocodeCache()
 
 # ---------------- HELPERS ----------------
-def get_exif(img_path):
+def nominatim_address(lat, lon):
     try:
-        image = Image.open(img_path)
-        exif = image._getexif()
-        if not exif:
-            return {}
-        return {TAGS.get(tag): val for tag, val in exif.items()}
-    except Exception:
-        return {}
-
-def _convert_to_degrees(value):
-    def to_float(v):
-        try:
-            return float(v)
-        except TypeError:
-            return v.numerator / v.denominator
-    d, m, s = value
-    return to_float(d) + to_float(m)/60 + to_float(s)/3600
-
-def get_gps_location(exif):
-    gps_info = exif.get("GPSInfo")
-    if not gps_info:
+        location = geolocator.reverse((lat, lon), exactly_one=True, timeout=10)
+    finally:
+        time.sleep(1)  # polite pause for Nominatim
+    if location and location.raw and 'address' in location.raw:
+        return location.raw['address']
+    return None
+
+def get_address(lat, lon):
+    """Address dict from the offline index, cached Nominatim as fallback"""
+    if offline_geocoder:
+        addr = offline_geocoder.reverse(lat, lon)
+        if addr:
+            return addr
+    if not USE_NOMINATIM:
         return None
     try:
-        lat = _convert_to_degrees(gps_info[2])
-        if gps_info[1] != 'N': lat = -lat
-        lon = _convert_to_degrees(gps_info[4])
-        if gps_info[3] != 'E': lon = -lon
-        return lat, lon
+        return geocode_cache.lookup(lat, lon, nominatim_address)
     except Exception:
         return None
 
 def get_location_name(lat, lon):
-    try:
-        location = geolocator.reverse((lat, lon), exactly_one=True, timeout=10)
-        if location and location.raw and 'address' in location.raw:
-            addr = location.raw['address']
-            street = addr.get('road') or "UnknownStreet"
-            suburb = addr.get('suburb') or addr.get('neighbourhood') or addr.get('village') or addr.get('town') or addr.get('city') or "UnknownLocation"
-            # ASCII safe
-            street = unidecode(street).replace(" ", "_") or "UnknownStreet"
-            suburb = unidecode(suburb).replace(" ", "_") or "UnknownLocation"
-            return f"{street}_{suburb}"
-    except Exception:
-        pass
+    addr = get_address(lat, lon)
+    if addr:
+        street = addr.get('road') or "UnknownStreet"
+        suburb = addr.get('suburb') or addr.get('neighbourhood') or addr.get('village') or addr.get('town') or addr.get('city') or "UnknownLocation"
+        # ASCII safe
+        street = unidecode(street).replace(" ", "_") or "UnknownStreet"
+        suburb = unidecode(suburb).replace(" ", "_") or "UnknownLocation"
+        return f"{street}_{suburb}"
     return "UnknownLocation"
 
-def get_photo_datetime(file_path):
+def get_photo_datetime(media_file):
     """Get photo taken datetime from EXIF, fallback to file modification time"""
-    try:
-        image = Image.open(file_path)
-        exif = image._getexif()
-        if exif:
-            dt = exif.get(36867) or exif.get(306)  # DateTimeOriginal or DateTime
-            if dt:
-                return datetime.strptime(dt, "%Y:%m:%d %H:%M:%S").strftime("%Y-%m-%d_%H-%M-%S")
-    except Exception:
-        pass
-    ts = os.path.getmtime(file_path)
-    return datetime.fromtimestamp(ts).strftime("%Y-%m-%d_%H-%M-%S")
+    if media_file.exif_time:
+        try:
+            return datetime.strptime(media_file.exif_time, "%Y:%m:%d %H:%M:%S").strftime("%Y-%m-%d_%H-%M-%S")
+        except ValueError:
+            pass
+    return datetime.fromtimestamp(media_file.mtime).strftime("%Y-%m-%d_%H-%M-%S")
 
 def is_file_locked(filepath):
     try:
@@ -138,53 +130,60 @@ def clean_original_name(stem):
 # ---------------- MAIN ----------------
 locked_files = []
 
-for root, _, files in os.walk(INPUT_FOLDER):
-    for file in files:
-        if not file.lower().endswith(SUPPORTED_EXTENSIONS):
-            continue
+index = MediaIndex()
+index.refresh(INPUT_FOLDER)
 
-        src_path = Path(root) / file
+for media_file in index.files(INPUT_FOLDER):
+    src_path = Path(media_file.path)
+    file = src_path.name
+    if not file.lower().endswith(SUPPORTED_EXTENSIONS):
+        continue
 
-        if is_file_locked(src_path):
-            print(f"Locked file skipped: {src_path}")
+    if is_file_locked(src_path):
+        print(f"Locked file skipped: {src_path}")
+        locked_files.append(str(src_path))
+        continue
+
+    filename_prefix = "UnknownCoords"
+    location_name = "UnknownLocation"
+
+    if file.lower().endswith((".jpg", ".jpeg")) and media_file.lat is not None:
+        gps = (media_file.lat, media_file.lon)
+        filename_prefix = f"{gps[0]:.5f}_{gps[1]:.5f}"
+        location_name = get_location_name(*gps)
+
+    timestamp = get_photo_datetime(media_file)
+    original_name = clean_original_name(src_path.stem)
+    original_name = unidecode(original_name).replace(" ", "_")
+
+    # Build new filename
+    new_filename = f"{original_name}_{filename_prefix}_{location_name}_{timestamp}{src_path.suffix}"
+
+    # Truncate to MAX_FILENAME_LEN
+    if len(new_filename) > MAX_FILENAME_LEN:
+        ext = src_path.suffix
+        name_without_ext = new_filename[:-len(ext)]
+        new_filename = name_without_ext[:MAX_FILENAME_LEN - len(ext)] + ext
+
+    dest_path = resolve_duplicate(src_path.parent / new_filename)
+
+    if DRY_RUN:
+        print(f"[DRY-RUN] Rename {src_path.name} -> {new_filename}")
+    else:
+        try:
+            src_path.rename(dest_path)
+            index.rename(src_path, dest_path)
+            print(f"Renamed {src_path.name} -> {new_filename}")
+        except PermissionError:
+            print(f"PermissionError, skipping: {src_path.name}")
             locked_files.append(str(src_path))
-            continue
-
-        filename_prefix = "UnknownCoords"
-        location_name = "UnknownLocation"
-
-        if file.lower().endswith((".jpg", ".jpeg")):
-            exif = get_exif(src_path)
-            gps = get_gps_location(exif)
-            if gps:
-                filename_prefix = f"{gps[0]:.5f}_{gps[1]:.5f}"
-                location_name = get_location_name(*gps)
-                time.sleep(1)  # polite pause for Nominatim
-
-        timestamp = get_photo_datetime(src_path)
-        original_name = clean_original_name(src_path.stem)
-        original_name = unidecode(original_name).replace(" ", "_")
-
-        # Build new filename
-        new_filename = f"{original_name}_{filename_prefix}_{location_name}_{timestamp}{src_path.suffix}"
-
-        # Truncate to MAX_FILENAME_LEN
-        if len(new_filename) > MAX_FILENAME_LEN:
-            ext = src_path.suffix
-            name_without_ext = new_filename[:-len(ext)]
-            new_filename = name_without_ext[:MAX_FILENAME_LEN - len(ext)] + ext
-
-        dest_path = resolve_duplicate(src_path.parent / new_filename)
-
-        if DRY_RUN:
-            print(f"[DRY-RUN] Rename {src_path.name} -> {new_filename}")
-        else:
-            try:
-                src_path.rename(dest_path)
-                print(f"Renamed {src_path.name} -> {new_filename}")
-            except PermissionError:
-                print(f"PermissionError, skipping: {src_path.name}")
-                locked_files.append(str(src_path))
+
+index.close()
+if offline_geocoder:
+    offline_geocoder.close()
+if geocode_cache.hits or geocode_cache.misses:
+    print(geocode_cache.summary())
+geocode_cache.close()
 
 # Write locked files to log
 if locked_files:
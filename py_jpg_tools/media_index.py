@@ -0,0 +1,149 @@
+import os
+import sqlite3
+from collections import namedtuple
+from PIL import Image
+
+"""
+Media Index: one SQLite row per file under a photo library
+
+The py_jpg_tools scripts query this index instead of walking the tree
+themselves. refresh() walks the folder once with os.scandir and only opens
+files whose size or modification time changed since the last run, so EXIF
+date and GPS data are read once per file rather than once per script.
+
+Stored per file: path, size, mtime, inode, EXIF timestamp and GPS coordinates.
+Folders are stored separately for the folder scripts.
+"""
+
+# ---------------- CONFIG ----------------
+INDEX_FILE = "media_index.sqlite"
+EXIF_EXTENSIONS = (".jpg", ".jpeg", ".png")
+
+MediaFile = namedtuple("MediaFile", "path size mtime inode exif_time lat lon")
+
+# ---------------- EXIF ----------------
+def _convert_to_degrees(value):
+    def to_float(v):
+        try:
+            return float(v)
+        except TypeError:
+            return v.numerator / v.denominator
+    d, m, s = value
+    return to_float(d) + to_float(m)/60 + to_float(s)/3600
+
+def read_exif_info(img_path):
+    """Return (timestamp, lat, lon) from EXIF; missing values are None"""
+    try:
+        with Image.open(img_path) as image:
+            exif = image._getexif()
+    except Exception:
+        return None, None, None
+    if not exif:
+        return None, None, None
+
+    exif_time = exif.get(36867) or exif.get(306)  # DateTimeOriginal or DateTime
+    lat = lon = None
+    gps_info = exif.get(34853)  # GPSInfo
+    if gps_info:
+        try:
+            lat = _convert_to_degrees(gps_info[2])
+            if gps_info[1] != 'N': lat = -lat
+            lon = _convert_to_degrees(gps_info[4])
+            if gps_info[3] != 'E': lon = -lon
+        except Exception:
+            lat = lon = None
+    return exif_time, lat, lon
+
+# ---------------- INDEX ----------------
+def _prefix_range(root):
+    """Bounds matching every path below root, usable with the primary key index"""
+    prefix = os.path.join(root, "")
+    return prefix, prefix[:-1] + chr(ord(prefix[-1]) + 1)
+
+class MediaIndex:
+    def __init__(self, index_file=INDEX_FILE):
+        self.connection = sqlite3.connect(index_file)
+        self.connection.executescript(
+            "CREATE TABLE IF NOT EXISTS files ("
+            "path TEXT PRIMARY KEY, size INTEGER, mtime REAL, inode INTEGER, exif_time TEXT, lat REAL, lon REAL);"
+            "CREATE TABLE IF NOT EXISTS folders (path TEXT PRIMARY KEY);"
+        )
+
+    def refresh(self, root):
+        """Walk root once; only new or changed files are re-read. Returns (updated, removed) counts."""
+        root = os.path.abspath(root)
+        low, high = _prefix_range(root)
+        known = {
+            path: (size, mtime) for path, size, mtime in self.connection.execute(
+                "SELECT path, size, mtime FROM files WHERE path >= ? AND path < ?", (low, high))
+        }
+
+        seen = set()
+        updated = []
+        folders = []
+        stack = [root]
+        while stack:
+            with os.scandir(stack.pop()) as entries:
+                for entry in entries:
+                    if entry.is_dir(follow_symlinks=False):
+                        folders.append((entry.path,))
+                        stack.append(entry.path)
+                        continue
+                    if not entry.is_file(follow_symlinks=False):
+                        continue
+                    stat = entry.stat(follow_symlinks=False)
+                    seen.add(entry.path)
+                    if known.get(entry.path) == (stat.st_size, stat.st_mtime):
+                        continue
+                    if entry.name.lower().endswith(EXIF_EXTENSIONS):
+                        exif_info = read_exif_info(entry.path)
+                    else:
+                        exif_info = (None, None, None)
+                    updated.append((entry.path, stat.st_size, stat.st_mtime, entry.inode(), *exif_info))
+
+        removed = [(path,) for path in known.keys() - seen]
+        with self.connection:
+            self.connection.executemany("INSERT OR REPLACE INTO files VALUES (?, ?, ?, ?, ?, ?, ?)", updated)
+            self.connection.executemany("DELETE FROM files WHERE path = ?", removed)
+            self.connection.execute("DELETE FROM folders WHERE path >= ? AND path < ?", (low, high))
+            self.connection.executemany("INSERT OR REPLACE INTO folders VALUES (?)", folders)
+        return len(updated), len(removed)
+
+    def files(self, root, recursive=True):
+        root = os.path.abspath(root)
+        rows = self.connection.execute(
+            "SELECT * FROM files WHERE path >= ? AND path < ? ORDER BY path", _prefix_range(root)
+        ).fetchall()
+        files = [MediaFile(*row) for row in rows]
+        if not recursive:
+            files = [f for f in files if os.path.dirname(f.path) == root]
+        return files
+
+    def folders(self, root):
+        """Folders below root, deepest first"""
+        rows = self.connection.execute(
+            "SELECT path FROM folders WHERE path >= ? AND path < ?", _prefix_range(os.path.abspath(root))
+        ).fetchall()
+        return sorted((path for (path,) in rows), key=lambda p: -len(p.split(os.sep)))
+
+    def rename(self, old_path, new_path):
+        """Record a rename or move of a file or folder (including everything below it)"""
+        old_path, new_path = os.path.abspath(old_path), os.path.abspath(new_path)
+        low, high = _prefix_range(old_path)
+        with self.connection:
+            for table in ("files", "folders"):
+                self.connection.execute(f"UPDATE {table} SET path = ? WHERE path = ?", (new_path, old_path))
+                self.connection.execute(
+                    f"UPDATE {table} SET path = ? || substr(path, ?) WHERE path >= ? AND path < ?",
+                    (new_path, len(old_path) + 1, low, high),
+                )
+
+    def remove(self, path):
+        path = os.path.abspath(path)
+        low, high = _prefix_range(path)
+        with self.connection:
+            for table in ("files", "folders"):
+                self.connection.execute(f"DELETE FROM {table} WHERE path = ? OR (path >= ? AND path < ?)", (path, low, high))
+
+    def close(self):
+        self.connection.close()
@@ -0,0 +1,202 @@
+import csv
+import json
+import math
+import mmap
+import os
+import struct
+import sys
+from array import array
+
+"""
+Offline Reverse Geocoder: nearest known place for a GPS coordinate, no network
+
+build_index() turns a local places dataset into one binary file holding a
+KD-tree over the places' positions on the unit sphere, stored as flat arrays
+in tree order (the median of every range is its node, no pointers). At run
+time the file is memory-mapped, so opening it is instant and only the pages
+a lookup touches are read from disk.
+
+Supported sources:
+- GeoNames dumps (cities500.txt, allCountries.txt, ...), optionally with
+  countryInfo.txt for full country names.
+- CSV files with lat and lon columns; every other column becomes an address
+  field (road, suburb, city, country, ...), e.g. an OSM extract exported to CSV.
+
+Lookups return an address dict shaped like Nominatim's raw['address'], so the
+scripts can use either backend with the same code.
+
+Build the index once:
+    python offline_geocoder.py cities500.txt countryInfo.txt
+"""
+
+# ---------------- CONFIG ----------------
+GEOCODER_INDEX = "geocoder.kdtree"
+MAX_DISTANCE_KM = 25  # nearest place further away than this counts as no match
+EARTH_RADIUS_KM = 6371.0
+
+MAGIC = b"GEOKD1" + (b"LE" if sys.byteorder == "little" else b"BE")
+HEADER = struct.Struct("<8sII")  # magic, place count, label blob size
+
+# ---------------- SOURCES ----------------
+def read_country_names(country_info_path):
+    """ISO code -> country name from GeoNames countryInfo.txt"""
+    names = {}
+    with open(country_info_path, encoding="utf-8") as f:
+        for line in f:
+            if line.startswith("#"):
+                continue
+            fields = line.rstrip("\n").split("\t")
+            if len(fields) > 4:
+                names[fields[0]] = fields[4]
+    return names
+
+def read_geonames(path, country_info_path=None):
+    """Yield (lat, lon, address) for every populated place in a GeoNames dump"""
+    country_names = read_country_names(country_info_path) if country_info_path else {}
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            fields = line.rstrip("\n").split("\t")
+            if len(fields) < 9 or fields[6] != "P":  # feature class P: city, town, village
+                continue
+            address = {"city": fields[1]}
+            country = country_names.get(fields[8], fields[8])
+            if country:
+                address["country"] = country
+            yield float(fields[4]), float(fields[5]), address
+
+def read_csv_places(path):
+    """Yield (lat, lon, address) from a CSV with lat/lon columns plus address columns"""
+    with open(path, newline="", encoding="utf-8") as f:
+        for row in csv.DictReader(f):
+            lat, lon = float(row.pop("lat")), float(row.pop("lon"))
+            yield lat, lon, {key: value for key, value in row.items() if value}
+
+# ---------------- BUILD ----------------
+def _to_xyz(lat, lon):
+    lat, lon = math.radians(lat), math.radians(lon)
+    return math.cos(lat) * math.cos(lon), math.cos(lat) * math.sin(lon), math.sin(lat)
+
+def build_index(places, index_file=GEOCODER_INDEX):
+    """Write a KD-tree file from (lat, lon, address) tuples; returns the place count"""
+    points = [(*_to_xyz(lat, lon), json.dumps(address, ensure_ascii=False)) for lat, lon, address in places]
+
+    # Put the median of every range in the middle, splitting on x, y, z by depth
+    stack = [(0, len(points), 0)]
+    while stack:
+        lo, hi, axis = stack.pop()
+        if hi - lo < 2:
+            continue
+        points[lo:hi] = sorted(points[lo:hi], key=lambda p: p[axis])
+        mid = (lo + hi) // 2
+        stack.append((lo, mid, (axis + 1) % 3))
+        stack.append((mid + 1, hi, (axis + 1) % 3))
+
+    coords = array("d")
+    offsets = array("I", [0])
+    labels = bytearray()
+    for x, y, z, label in points:
+        coords.extend((x, y, z))
+        labels += label.encode("utf-8")
+        offsets.append(len(labels))
+
+    tmp_file = index_file + ".tmp"
+    with open(tmp_file, "wb") as f:
+        f.write(HEADER.pack(MAGIC, len(points), len(labels)))
+        coords.tofile(f)
+        offsets.tofile(f)
+        f.write(labels)
+    os.replace(tmp_file, index_file)
+    return len(points)
+
+# ---------------- LOOKUP ----------------
+class OfflineGeocoder:
+    def __init__(self, index_file=GEOCODER_INDEX):
+        self.file = open(index_file, "rb")
+        self.map = mmap.mmap(self.file.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, self.count, label_size = HEADER.unpack_from(self.map)
+        if magic != MAGIC:
+            self.close()
+            raise ValueError(f"{index_file} is not a geocoder index for this platform, rebuild it")
+
+        self.view = view = memoryview(self.map)
+        start = HEADER.size
+        self.coords = view[start:start + 24 * self.count].cast("d")
+        start += 24 * self.count
+        self.offsets = view[start:start + 4 * (self.count + 1)].cast("I")
+        start += 4 * (self.count + 1)
+        self.labels = view[start:start + label_size]
+
+    def nearest(self, lat, lon):
+        """Return (address, distance_km) of the closest place, or (None, None) for an empty index"""
+        if not self.count:
+            return None, None
+        target = _to_xyz(lat, lon)
+        coords = self.coords
+        best, best_dist = -1, float("inf")
+
+        stack = [(0, self.count, 0)]
+        while stack:
+            lo, hi, axis = stack.pop()
+            if lo >= hi:
+                continue
+            mid = (lo + hi) // 2
+            i = 3 * mid
+            dx, dy, dz = coords[i] - target[0], coords[i + 1] - target[1], coords[i + 2] - target[2]
+            dist = dx * dx + dy * dy + dz * dz
+            if dist < best_dist:
+                best, best_dist = mid, dist
+
+            diff = target[axis] - coords[i + axis]
+            near, far = ((lo, mid), (mid + 1, hi)) if diff < 0 else ((mid + 1, hi), (lo, mid))
+            next_axis = (axis + 1) % 3
+            if diff * diff < best_dist:
+                stack.append((*far, next_axis))
+            stack.append((*near, next_axis))  # popped first
+
+        # Chord length on the unit sphere -> great-circle distance
+        distance_km = 2 * EARTH_RADIUS_KM * math.asin(min(1.0, math.sqrt(best_dist) / 2))
+        return self.address(best), distance_km
+
+    def address(self, position):
+        label = self.labels[self.offsets[position]:self.offsets[position + 1]]
+        return json.loads(bytes(label).decode("utf-8"))
+
+    def reverse(self, lat, lon, max_distance_km=MAX_DISTANCE_KM):
+        """Address of the closest place within max_distance_km, else None"""
+        address, distance_km = self.nearest(lat, lon)
+        if address is None or distance_km > max_distance_km:
+            return None
+        return address
+
+    def reverse_many(self, points, max_distance_km=MAX_DISTANCE_KM):
+        """Batched reverse(); identical coordinates are looked up once"""
+        results = {}
+        for point in points:
+            if point not in results:
+                results[point] = self.reverse(*point, max_distance_km=max_distance_km)
+        return [results[point] for point in points]
+
+    def close(self):
+        for name in ("coords", "offsets", "labels", "view"):
+            view = self.__dict__.pop(name, None)
+            if view is not None:
+                view.release()
+        self.map.close()
+        self.file.close()
+
+def open_geocoder(index_file=GEOCODER_INDEX):
+    """OfflineGeocoder for index_file, or None when no index has been built"""
+    if not os.path.exists(index_file):
+        return None
+    return OfflineGeocoder(index_file)
+
+if __name__ == "__main__":
+    if len(sys.argv) < 2:
+        sys.exit("usage: python offline_geocoder.py <geonames.txt | places.csv> [countryInfo.txt]")
+    source = sys.argv[1]
+    if source.lower().endswith(".csv"):
+        places = read_csv_places(source)
+    else:
+        places = read_geonames(source, sys.argv[2] if len(sys.argv) > 2 else None)
+    count = build_index(places)
+    print(f"Indexed {count} places into {GEOCODER_INDEX}")
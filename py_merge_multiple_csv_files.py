@@ -1,14 +1,164 @@
-# merge multiple csv files with pandas
+# merge multiple csv files into one, keeping a single header row
 # https://stackoverflow.com/questions/2512386/how-to-merge-200-csv-files-in-python
-# define/create export file
-fout=open("out3.csv","a")
-# define first file to be exported:
-for line in open("20220425_absence_mrr_development_1.csv"):
-    fout.write(line)
-# range for the rest files, based on name convention:    
-for num in range(1,27):
-    f = open("20220425_absence_mrr_development_"+str(num)+".csv")
-
-    for line in f:
-         fout.write(line)
- fout.close()
\ No newline at end of file
+import csv
+import glob
+import os
+import re
+import shutil
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+
+# files to merge (glob pattern) and the export file
+INPUT_PATTERN = "20220425_absence_mrr_development_*.csv"
+OUTPUT_FILE = "out3.csv"
+BUFFER_SIZE = 16 * 1024 * 1024  # bytes per copy call when schemas match
+
+# Parquet output (needs pyarrow): one row group per source file plus a column naming it
+OUTPUT_FORMAT = "csv"  # or "parquet"
+PARQUET_OUTPUT_FILE = "out3.parquet"
+READ_WORKERS = 4  # files parsed at the same time
+READ_BLOCK_SIZE = 64 * 1024 * 1024  # bytes parsed per typed chunk
+SOURCE_COLUMN = "source_file"
+
+
+# sort key so that _2 comes before _10
+def natural_key(path):
+    return [int(part) if part.isdigit() else part for part in re.split(r"(\d+)", path)]
+
+
+def read_header(path):
+    with open(path, newline="", encoding="utf-8-sig") as f:
+        return next(csv.reader(f), [])
+
+
+# same header everywhere: copy raw bytes, skipping the header line of every file but the first
+def copy_files(input_files, output_file):
+    with open(output_file, "wb") as fout:
+        for index, path in enumerate(input_files):
+            with open(path, "rb") as f:
+                if os.fstat(f.fileno()).st_size == 0:
+                    continue
+                f.seek(-1, os.SEEK_END)
+                ends_with_newline = f.read(1) == b"\n"
+                f.seek(0)
+                if index > 0:
+                    f.readline()
+                shutil.copyfileobj(f, fout, BUFFER_SIZE)
+                if not ends_with_newline:
+                    fout.write(b"\n")
+
+
+# different headers: write the union of all columns, filling missing ones with ""
+# fields beyond a file's header are dropped; returns the (file, line) of every such row
+def align_files(input_files, output_file, headers):
+    fieldnames = list(dict.fromkeys(column for header in headers for column in header))
+    long_rows = []
+    with open(output_file, "w", newline="", encoding="utf-8") as fout:
+        writer = csv.DictWriter(fout, fieldnames=fieldnames, restval="", extrasaction="ignore")
+        writer.writeheader()
+        for path in input_files:
+            with open(path, newline="", encoding="utf-8-sig") as f:
+                reader = csv.DictReader(f)
+                for row in reader:
+                    # DictReader puts fields beyond the header under the None key
+                    if row.pop(None, None):
+                        long_rows.append((path, reader.line_num))
+                    writer.writerow(row)
+    return long_rows
+
+
+def merge_csv_files(input_files, output_file):
+    headers = [read_header(path) for path in input_files]
+    if all(header == headers[0] for header in headers):
+        copy_files(input_files, output_file)
+    else:
+        print("Headers differ between files, merging by column name.")
+        long_rows = align_files(input_files, output_file, headers)
+        for path, line_num in long_rows:
+            print(f"{path}, line {line_num}: more fields than the header, extra fields dropped")
+
+
+# parse one csv file into typed columns and park it as a temporary parquet part
+def csv_to_parquet_part(path, part_path):
+    import pyarrow as pa
+    import pyarrow.csv as pa_csv
+    import pyarrow.parquet as pq
+
+    table = pa_csv.read_csv(path, read_options=pa_csv.ReadOptions(block_size=READ_BLOCK_SIZE))
+    table = table.append_column(SOURCE_COLUMN, pa.array([os.path.basename(path)] * table.num_rows, pa.string()))
+    pq.write_table(table, part_path)
+    return table.schema
+
+
+# union of all columns; a column typed differently across files becomes float64 if all numeric, else string
+def union_schema(schemas):
+    import pyarrow as pa
+
+    column_types = {}
+    for schema in schemas:
+        for field in schema:
+            column_types.setdefault(field.name, set())
+            if not pa.types.is_null(field.type):
+                column_types[field.name].add(field.type)
+
+    fields = []
+    for name, types in column_types.items():
+        if len(types) == 1:
+            column_type = types.pop()
+        elif not types:
+            column_type = pa.string()
+        elif all(pa.types.is_integer(t) or pa.types.is_floating(t) for t in types):
+            column_type = pa.float64()
+        else:
+            column_type = pa.string()
+        fields.append(pa.field(name, column_type))
+    return pa.schema(fields)
+
+
+def align_table(table, schema):
+    import pyarrow as pa
+
+    columns = [
+        table.column(field.name).cast(field.type) if field.name in table.column_names
+        else pa.nulls(table.num_rows, field.type)
+        for field in schema
+    ]
+    return pa.Table.from_arrays(columns, schema=schema)
+
+
+# parse the csv files in parallel and write them to a single parquet file, one row group per file
+# empty (0 byte) files are skipped; the source column comes after all data columns
+def merge_to_parquet(input_files, output_file, workers=READ_WORKERS):
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    input_files = [path for path in input_files if os.path.getsize(path) > 0]
+    if not input_files:
+        return
+    output_folder = os.path.dirname(os.path.abspath(output_file))
+    with tempfile.TemporaryDirectory(dir=output_folder) as tmp_folder:
+        part_paths = [os.path.join(tmp_folder, f"{index}.parquet") for index in range(len(input_files))]
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            schemas = list(executor.map(csv_to_parquet_part, input_files, part_paths))
+
+        schema = union_schema(schemas)
+        schema = schema.remove(schema.get_field_index(SOURCE_COLUMN)).append(pa.field(SOURCE_COLUMN, pa.string()))
+        with pq.ParquetWriter(output_file, schema) as writer:
+            for part_path in part_paths:
+                table = align_table(pq.read_table(part_path), schema)
+                writer.write_table(table, row_group_size=max(1, table.num_rows))
+
+
+if __name__ == "__main__":
+    input_files = sorted(
+        (path for path in glob.glob(INPUT_PATTERN) if os.path.abspath(path) != os.path.abspath(OUTPUT_FILE)),
+        key=natural_key,
+    )
+    if input_files and OUTPUT_FORMAT == "parquet":
+        merge_to_parquet(input_files, PARQUET_OUTPUT_FILE)
+        print(f"Merged {len(input_files)} files into {PARQUET_OUTPUT_FILE}")
+    elif input_files:
+        merge_csv_files(input_files, OUTPUT_FILE)
+        print(f"Merged {len(input_files)} files into {OUTPUT_FILE}")
+    else:
+        print(f"No files match {INPUT_PATTERN}")
@@ -1,22 +1,103 @@
 import os
+import json
+import uuid
 import datetime
 
-def rename_files(folder_path):
-    files = [file for file in os.listdir(folder_path) if file.endswith(".mp4")]
+JOURNAL_NAME = ".rename_journal.json"  # written into the folder, used by undo_rename
+
+
+def scan_files(folder_path, extensions):
+    # One os.scandir pass; the stat result comes with the directory entry
+    files = []
+    with os.scandir(folder_path) as entries:
+        for entry in entries:
+            if entry.is_file() and entry.name.lower().endswith(extensions):
+                files.append((entry.path, entry.stat().st_mtime))
+    return files
+
+
+def check_plan(plan):
+    # Every target must be unique and either free or freed by another rename in the plan
+    sources = {os.path.abspath(old_path) for old_path, _ in plan}
+    targets = set()
+    for _, new_path in plan:
+        target = os.path.abspath(new_path)
+        if target in targets:
+            raise ValueError(f"Two files would be renamed to {new_path}")
+        if os.path.exists(target) and target not in sources:
+            raise FileExistsError(f"Target already exists and is not part of the rename: {new_path}")
+        targets.add(target)
+
+
+def apply_plan(plan, journal_path=None):
+    """Rename (old_path, new_path) pairs in two phases so any permutation is safe.
+
+    Every file is first moved to a unique temporary name next to it, then to its target.
+    The journal records all three names before anything is touched, and its phase is
+    advanced to "temporary" before the first file moves to its target and to "complete"
+    once every file has reached it.
+    """
+    plan = [(old_path, new_path) for old_path, new_path in plan if old_path != new_path]
+    check_plan(plan)
+
+    steps = [
+        {"old": old_path, "tmp": os.path.join(os.path.dirname(old_path), f".{uuid.uuid4().hex}.renametmp"), "new": new_path}
+        for old_path, new_path in plan
+    ]
+    if journal_path:
+        write_journal(journal_path, steps, "planned")
+
+    for step in steps:
+        os.rename(step["old"], step["tmp"])
+    if journal_path:
+        write_journal(journal_path, steps, "temporary")
+    for step in steps:
+        os.rename(step["tmp"], step["new"])
 
+    if journal_path:
+        write_journal(journal_path, steps, "complete")
+    return steps
+
+
+def write_journal(journal_path, steps, phase):
+    with open(journal_path, "w", encoding="utf-8") as journal:
+        json.dump({"phase": phase, "steps": steps}, journal, indent=1)
+        journal.flush()
+        os.fsync(journal.fileno())
+
+
+def undo_rename(journal_path):
+    # Move files back to their original names, also after a run that stopped halfway
+    with open(journal_path, encoding="utf-8") as journal:
+        state = json.load(journal)
+    steps = state["steps"]
+    phase = state.get("phase") or ("complete" if state.get("complete") else "planned")
+
+    # A file at its temporary name goes straight back. Otherwise it is still at its old name,
+    # unless the run got to the "temporary" phase: from then on no file is left at an old name
+    plan = []
+    for step in steps:
+        if os.path.exists(step["tmp"]):
+            plan.append((step["tmp"], step["old"]))
+        elif phase != "planned" and os.path.exists(step["new"]):
+            plan.append((step["new"], step["old"]))
+    apply_plan(plan)
+    os.remove(journal_path)
+
+
+def rename_files(folder_path):
     # Sort files based on their modification time
-    files_with_time = [(file, os.path.getmtime(os.path.join(folder_path, file))) for file in files]
+    files_with_time = scan_files(folder_path, (".mp4",))
     files_with_time.sort(key=lambda x: x[1])
 
-    # Rename files
-    for index, (file, _) in enumerate(files_with_time, start=1):
-        _, file_extension = os.path.splitext(file)
+    # Build the full plan first, then rename
+    plan = []
+    for index, (old_path, _) in enumerate(files_with_time, start=1):
+        _, file_extension = os.path.splitext(old_path)
         new_name = f"{index}{file_extension}"
-        
-        # Rename the file
-        old_path = os.path.join(folder_path, file)
-        new_path = os.path.join(folder_path, new_name)
-        os.rename(old_path, new_path)
+        plan.append((old_path, os.path.join(folder_path, new_name)))
+
+    apply_plan(plan, os.path.join(folder_path, JOURNAL_NAME))
 
 if __name__ == "__main__":
     folder_path = "/Users/vgaryfallos/Desktop/tum/1" # Change this to the path of your folder
@@ -0,0 +1,20 @@
+import os
+import sys
+import types
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.join(ROOT, "py_jpg_tools"))
+
+
+def install_fake_module(name, **attributes):
+    """Register a stand-in for an SDK the script imports but the test never calls."""
+    if name in sys.modules:
+        return sys.modules[name]
+    module = types.ModuleType(name)
+    module.__dict__.update(attributes)
+    sys.modules[name] = module
+    parent, _, child = name.rpartition(".")
+    if parent:
+        setattr(install_fake_module(parent), child, module)
+    return module
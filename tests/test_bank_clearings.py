@@ -0,0 +1,160 @@
+import os
+import sys
+import types
+import zoneinfo
+
+import pytest
+
+from conftest import ROOT, install_fake_module
+
+
+def rowcol_to_a1(row, col):
+    letters = ""
+    while col:
+        col, remainder = divmod(col - 1, 26)
+        letters = chr(65 + remainder) + letters
+    return f"{letters}{row}"
+
+
+def load_script():
+    """Import bank_clearings_.py, a Colab export, without its !pip lines and Colab/SDK imports."""
+    install_fake_module("chargebee", configure=lambda *args: None)
+    install_fake_module("gspread", utils=types.SimpleNamespace(rowcol_to_a1=rowcol_to_a1))
+    install_fake_module("google.colab", auth=None, drive=None)
+    install_fake_module("google.auth", default=None)
+    install_fake_module("pytz", timezone=zoneinfo.ZoneInfo)
+
+    path = os.path.join(ROOT, "bank_clearings_.py")
+    with open(path, encoding="utf-8") as script:
+        source = "".join(line for line in script if not line.startswith("!"))
+    module = types.ModuleType("bank_clearings_")
+    module.__file__ = path
+    exec(compile(source, path, "exec"), module.__dict__)
+    sys.modules["bank_clearings_"] = module
+    return module
+
+
+bank = load_script()
+
+
+class FakeWorksheet:
+    def __init__(self):
+        self.batch_update_calls = []
+
+    def batch_update(self, updates):
+        self.batch_update_calls.append(list(updates))
+
+
+def make_rows(count):
+    return [(row_index, [f"IN{row_index}", "10,00"]) for row_index in range(2, count + 2)]
+
+
+@pytest.fixture
+def fast_limits(monkeypatch):
+    monkeypatch.setattr(bank, "RATE_LIMIT_PER_SEC", 100000)
+    monkeypatch.setattr(bank, "BACKOFF_BASE", 0.001)
+
+
+def test_filter_rows_matches_date_prefix_and_ledger(tmp_path):
+    data = [
+        ("date", "amount", "identifier"),
+        (" 01.02.2024", "10,00 ", "IN1 "),
+        ("01.02.2024", "20,00", "CN2"),
+        ("02.02.2024", "30,00", "IN3"),
+        ("01.02.2024 ", " 40,00", " IN4"),
+    ]
+    ledger = bank.PaymentLedger(str(tmp_path / "ledger.jsonl"))
+    ledger.record("IN4", "40,00", "01.02.2024")
+
+    assert bank.filter_rows(data, "01.02.2024", 0, 2) == [(2, data[1]), (5, data[4])]
+    assert bank.filter_rows(data, "01.02.2024", 0, 2, 1, ledger) == [(2, data[1])]
+
+
+def test_ledger_recovers_from_torn_last_line(tmp_path):
+    ledger_path = str(tmp_path / "ledger.jsonl")
+    with open(ledger_path, "w", encoding="utf-8") as ledger_file:
+        ledger_file.write('{"invoice": "IN1", "amount": "1,00", "date": "01.02.2024"}\n{"invoice": "IN2", "amo')
+
+    ledger = bank.PaymentLedger(ledger_path)
+    ledger.record("IN3", "3,00", "01.02.2024")
+
+    reloaded = bank.PaymentLedger(ledger_path)
+    assert reloaded.entries == {("IN1", "1,00", "01.02.2024"), ("IN3", "3,00", "01.02.2024")}
+
+
+def test_workers_write_the_ledger_and_ledger_errors_are_not_payment_failures(tmp_path, monkeypatch, fast_limits):
+    monkeypatch.setattr(bank, "record_payment", lambda invoice_number, amount: None)
+
+    class BrokenLedger:
+        def record(self, invoice_number, amount, date):
+            raise OSError("disk full")
+
+    pushed, errors, successful, failed = bank.process_payments(
+        make_rows(3), FakeWorksheet(), 2, 0, 1, ledger=BrokenLedger(), payment_date="01.02.2024")
+    assert (pushed, errors, failed) == (3, 0, [])
+
+    ledger = bank.PaymentLedger(str(tmp_path / "ledger.jsonl"))
+    assert bank.push_payment("IN7", "7,00", bank.TokenBucket(1000), ledger, "01.02.2024") is None
+    assert ("IN7", "7,00", "01.02.2024") in bank.PaymentLedger(ledger.path)
+
+
+def test_status_updates_are_batched(monkeypatch, fast_limits):
+    monkeypatch.setattr(bank, "record_payment", lambda invoice_number, amount: None)
+    worksheet = FakeWorksheet()
+
+    pushed, errors, _, _ = bank.process_payments(make_rows(250), worksheet, 26, 0, 1)
+
+    assert (pushed, errors) == (250, 0)
+    assert [len(call) for call in worksheet.batch_update_calls] == [100, 100, 50]
+    assert worksheet.batch_update_calls[0][0]["range"] == "AA2"
+
+
+class RateLimited(Exception):
+    http_status_code = 429
+
+    def __init__(self, retry_after=None):
+        super().__init__("Too many requests")
+        self.headers = {"Retry-After": retry_after} if retry_after else {}
+
+
+class FakeChargebee:
+    """record_payment stand-in with per-call latency and scripted 429 responses."""
+
+    def __init__(self, latency, rate_limited_attempts):
+        self.latency = latency
+        self.rate_limited_attempts = rate_limited_attempts  # invoice -> number of 429s before success
+        self.attempts = {}
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self.lock = bank.threading.Lock()
+
+    def record_payment(self, invoice_number, amount):
+        with self.lock:
+            self.in_flight += 1
+            self.max_in_flight = max(self.max_in_flight, self.in_flight)
+            attempt = self.attempts[invoice_number] = self.attempts.get(invoice_number, 0) + 1
+        try:
+            bank.time.sleep(self.latency)
+            if attempt <= self.rate_limited_attempts.get(invoice_number, 0):
+                raise RateLimited(retry_after="0.01" if attempt == 1 else None)
+        finally:
+            with self.lock:
+                self.in_flight -= 1
+
+
+def test_concurrent_payments_with_latency_and_rate_limits(monkeypatch, fast_limits):
+    rows = make_rows(40)
+    fake = FakeChargebee(latency=0.02, rate_limited_attempts={"IN5": 1, "IN12": 2, "IN30": 99})
+    monkeypatch.setattr(bank, "record_payment", fake.record_payment)
+
+    start = bank.time.monotonic()
+    pushed, errors, successful, failed = bank.process_payments(rows, FakeWorksheet(), 26, 0, 1, concurrency=4)
+    elapsed = bank.time.monotonic() - start
+
+    assert (pushed, errors) == (39, 1)
+    assert [invoice for invoice, _, _ in failed] == ["IN30"]
+    assert fake.attempts["IN5"] == 2 and fake.attempts["IN12"] == 3
+    assert fake.attempts["IN30"] == bank.MAX_RETRIES
+    assert [invoice for invoice, _ in successful] == [f"IN{i}" for i in range(2, 42) if i != 30]
+    assert 1 < fake.max_in_flight <= 4
+    assert elapsed < 40 * fake.latency  # faster than one request at a time
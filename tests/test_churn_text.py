@@ -0,0 +1,32 @@
+import csv
+
+from churn_text import TermIndex
+
+
+class SplitTokenizer:
+    def tokenize(self, text):
+        return text.lower().split()
+
+
+def write_export(path, rows):
+    with open(path, 'w', newline='', encoding='utf-8') as f:
+        writer = csv.writer(f)
+        writer.writerow(['Reason for churn', 'Churn Date', 'Segment'])
+        writer.writerows(rows)
+
+
+def test_add_file_indexes_only_appended_rows(tmp_path):
+    export = str(tmp_path / 'churn.csv')
+    index = TermIndex(str(tmp_path / 'terms.sqlite'), tokenizer=SplitTokenizer())
+
+    write_export(export, [['price high', '01.03.2023', 'SMB']])
+    assert index.add_file(export) == 1
+    assert index.add_file(export) == 0
+
+    with open(export, 'a', newline='', encoding='utf-8') as f:
+        csv.writer(f).writerow(['support slow', '15.03.2023', 'SMB'])
+    assert index.add_file(export) == 1
+
+    assert dict(index.top_terms('2023-03', ngram=1)) == {'high': 1, 'price': 1, 'slow': 1, 'support': 1}
+    assert index.trend('price') == [('2023-03', 1)]
+    index.close()
@@ -0,0 +1,56 @@
+import io
+import mailbox
+from email.message import EmailMessage
+
+import eml_parser2
+from eml_parser2 import parse_eml_files, parse_mailbox, read_header_bytes
+
+
+def make_message(subject, body):
+    msg = EmailMessage()
+    msg["From"] = "anna@example.com"
+    msg["Subject"] = subject
+    msg["Date"] = "Mon, 05 Feb 2024 10:00:00 +0100"
+    msg.set_content(body)
+    return msg
+
+
+def test_read_header_bytes_stops_before_body():
+    raw = b"From: a@example.com\r\nSubject: Hi\r\n\r\n" + b"x" * 1_000_000
+    message_file = io.BytesIO(raw)
+    assert read_header_bytes(message_file) == b"From: a@example.com\r\nSubject: Hi\r\n"
+    assert message_file.tell() == len(b"From: a@example.com\r\nSubject: Hi\r\n\r\n")
+
+
+def test_header_only_mailbox_report(tmp_path):
+    mbox_path = str(tmp_path / "archive.mbox")
+    box = mailbox.mbox(mbox_path)
+    box.add(make_message("Invoice", "line\n" * 200_000))
+    box.add(make_message("Reminder", "short"))
+    box.close()
+
+    results = list(parse_mailbox(mbox_path, include_body=False))
+    assert [error for _, _, error in results] == [None, None]
+    assert [parsed[:2] for _, parsed, _ in results] == [
+        ("anna@example.com", "Invoice"), ("anna@example.com", "Reminder"),
+    ]
+
+    with_body = list(parse_mailbox(mbox_path, include_body=True))
+    assert with_body[1][1][3].strip() == "short"
+
+
+def test_parse_eml_files_reads_a_generator_only_a_window_ahead(tmp_path):
+    eml_file = tmp_path / "invoice.eml"
+    eml_file.write_bytes(make_message("Invoice", "see attachment").as_bytes())
+    pulled = []
+
+    def eml_files():
+        for i in range(500):
+            pulled.append(i)
+            yield str(eml_file)
+
+    results = parse_eml_files(eml_files(), workers=2, chunk_size=4)
+    eml_path, parsed, error = next(results)
+    assert (eml_path, parsed[1], error) == (str(eml_file), "Invoice", None)
+    assert len(pulled) <= (eml_parser2.CHUNKS_AHEAD_PER_WORKER * 2 + 1) * 4
+    assert sum(1 for _ in results) == 499
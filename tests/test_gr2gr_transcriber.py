@@ -0,0 +1,159 @@
+import importlib
+import json
+import os
+import sqlite3
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from types import SimpleNamespace
+
+import pytest
+
+from conftest import install_fake_module
+
+try:
+    import faster_whisper  # noqa: F401
+except ImportError:
+    install_fake_module("faster_whisper", WhisperModel=object)
+    install_fake_module("faster_whisper.audio", decode_audio=None)
+    install_fake_module("faster_whisper.vad", VadOptions=object, get_speech_timestamps=None)
+
+transcriber = importlib.import_module("gr2gr_transcriber")
+
+
+class StubModel:
+    def __init__(self, segments):
+        self.segments = segments
+
+    def transcribe(self, *args, **kwargs):
+        segments = (SimpleNamespace(start=start, end=end, text=text, words=None) for start, end, text in self.segments)
+        return segments, None
+
+
+def test_resume_from_legacy_checkpoint(tmp_path, monkeypatch):
+    mp3_path = tmp_path / "talk.mp3"
+    mp3_path.write_bytes(b"")
+    # Written by the script before segment counts and output offsets were checkpointed
+    mp3_path.with_suffix(transcriber.CHECKPOINT_SUFFIX).write_text(json.dumps({"last_end": 2.0}), encoding="utf-8")
+    mp3_path.with_suffix(".txt").write_text("[00:00:00 → 00:00:02] first\n", encoding="utf-8")
+
+    model = StubModel([(0.0, 2.0, "first"), (2.0, 4.0, "second"), (4.0, 6.0, "third")])
+    monkeypatch.setattr(transcriber, "load_model", lambda cpu_threads=0: model)
+
+    transcriber.transcribe_resumable_with_timestamps(str(mp3_path), formats=("txt", "srt"))
+
+    assert mp3_path.with_suffix(".txt").read_text(encoding="utf-8").splitlines() == [
+        "[00:00:00 → 00:00:02] first",
+        "[00:00:02 → 00:00:04] second",
+        "[00:00:04 → 00:00:06] third",
+    ]
+    assert mp3_path.with_suffix(".srt").read_text(encoding="utf-8").startswith("1\n00:00:02,000 --> 00:00:04,000\nsecond\n")
+    assert not mp3_path.with_suffix(transcriber.CHECKPOINT_SUFFIX).exists()
+
+
+def test_touched_done_file_stays_done(tmp_path):
+    mp3_path = tmp_path / "talk.mp3"
+    mp3_path.write_bytes(b"audio")
+    queue = transcriber.JobQueue(tmp_path / transcriber.JOBS_DB_NAME)
+    queue.add(mp3_path, ("txt",))
+    queue.set_status(mp3_path, "done", progress=1.0)
+    mp3_path.with_suffix(".txt").write_text("[00:00:00 → 00:00:02] first\n", encoding="utf-8")
+
+    stat = mp3_path.stat()
+    os.utime(mp3_path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 5_000_000_000))
+    queue.add(mp3_path, ("txt",))
+
+    assert queue.summary() == {"done": 1}
+    assert queue.pending() == []
+    queue.close()
+
+
+def test_batch_marks_only_started_jobs_running(tmp_path, monkeypatch):
+    for name in ("a.mp3", "b.mp3", "c.mp3", "d.mp3", "e.mp3"):
+        (tmp_path / name).write_bytes(name.encode())
+    db_path = tmp_path / transcriber.JOBS_DB_NAME
+    running_counts = []
+
+    def fake_transcribe(mp3_path, formats):
+        with sqlite3.connect(db_path) as connection:
+            running_counts.append(connection.execute("SELECT COUNT(*) FROM jobs WHERE status = 'running'").fetchone()[0])
+        Path(mp3_path).with_suffix(".txt").write_text("", encoding="utf-8")
+
+    monkeypatch.setattr(transcriber, "ProcessPoolExecutor", ThreadPoolExecutor)
+    monkeypatch.setattr(transcriber, "load_model", lambda cpu_threads=0: None)
+    monkeypatch.setattr(transcriber, "transcribe_resumable_with_timestamps", fake_transcribe)
+
+    transcriber.transcribe_batch(str(tmp_path), workers=2)
+
+    assert len(running_counts) == 5
+    assert max(running_counts) <= 2
+    with sqlite3.connect(db_path) as connection:
+        assert connection.execute("SELECT status, COUNT(*) FROM jobs GROUP BY status").fetchall() == [("done", 5)]
+
+
+def test_pending_orders_unknown_durations_last(tmp_path, monkeypatch):
+    durations = {"short.mp3": 60.0, "long.mp3": 600.0, "big.mp3": None, "small.mp3": None}
+    sizes = {"short.mp3": 10, "long.mp3": 20, "big.mp3": 5000, "small.mp3": 50}
+    for name, size in sizes.items():
+        (tmp_path / name).write_bytes(b"x" * size)
+    monkeypatch.setattr(transcriber, "audio_duration", lambda path: durations[path.name])
+
+    queue = transcriber.JobQueue(tmp_path / transcriber.JOBS_DB_NAME)
+    for name in sizes:
+        queue.add(tmp_path / name, ("txt",))
+
+    assert [(path.name, duration) for path, duration in queue.pending()] == [
+        ("long.mp3", 600.0), ("short.mp3", 60.0), ("big.mp3", None), ("small.mp3", None),
+    ]
+    queue.close()
+
+
+def test_outputs_and_checkpoint_are_fsynced(tmp_path, monkeypatch):
+    synced = []
+    real_fsync = os.fsync
+    monkeypatch.setattr(transcriber.os, "fsync", lambda fd: synced.append(fd) or real_fsync(fd))
+
+    sink = transcriber.TextSink(tmp_path / "talk.txt", 0, 0)
+    sink.write(0.0, 2.0, "first")
+    offset = sink.flush()
+    transcriber.write_checkpoint(tmp_path / "talk.checkpoint.json", {"last_end": 2.0, "offsets": {"txt": offset}})
+    sink.close()
+
+    assert len(synced) == 2
+    assert json.loads((tmp_path / "talk.checkpoint.json").read_text(encoding="utf-8"))["offsets"] == {"txt": offset}
+
+
+def test_failed_chunk_cancels_pending_chunks_and_keeps_finished_ones(tmp_path, monkeypatch):
+    mp3_path = tmp_path / "talk.mp3"
+    mp3_path.write_bytes(b"")
+    started = []
+    shutting_down = threading.Event()
+
+    class Executor(ThreadPoolExecutor):
+        def shutdown(self, wait=True, cancel_futures=False):
+            super().shutdown(wait=False, cancel_futures=cancel_futures)
+            shutting_down.set()
+            super().shutdown(wait=wait)
+
+    def fake_transcribe_chunk(audio, offset):
+        started.append(offset)
+        if offset == 1.0:
+            raise ValueError("corrupt frame")
+        if offset == 2.0:
+            shutting_down.wait()  # if the worker got to it, it is still running when chunk 1 fails
+        return [[offset, offset + 1.0, f"chunk at {offset}"]]
+
+    monkeypatch.setattr(transcriber, "ProcessPoolExecutor", Executor)
+    monkeypatch.setattr(transcriber, "load_model", lambda cpu_threads=0: None)
+    monkeypatch.setattr(transcriber, "decode_audio", lambda path, sampling_rate: [0.0] * (4 * sampling_rate))
+    monkeypatch.setattr(transcriber, "transcribe_chunk", fake_transcribe_chunk)
+    chunks = [[i * transcriber.SAMPLING_RATE, (i + 1) * transcriber.SAMPLING_RATE] for i in range(4)]
+    monkeypatch.setattr(transcriber, "plan_chunks", lambda audio: chunks)
+
+    with pytest.raises(RuntimeError, match="Chunk 1 failed"):
+        transcriber.transcribe_parallel_with_timestamps(str(mp3_path), workers=1)
+
+    checkpoint = json.loads(mp3_path.with_suffix(transcriber.CHUNKS_CHECKPOINT_SUFFIX).read_text(encoding="utf-8"))
+    assert checkpoint["done"]["0"] == [[0.0, 1.0, "chunk at 0.0"]]
+    assert sorted(checkpoint["done"]) == (["0", "2"] if 2.0 in started else ["0"])
+    assert 3.0 not in started
@@ -0,0 +1,104 @@
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import docx
+import pytest
+
+import html_text_parser_
+from html_text_parser_ import PageCache, crawl, declared_charset, extract_text, scrape_urls
+
+
+class PageHandler(BaseHTTPRequestHandler):
+    """/page/<n> serves "Page <n>" with an ETag, later pages faster; anything else is a 404."""
+
+    def do_GET(self):
+        if not self.path.startswith("/page/"):
+            self.send_error(404)
+            return
+        number = int(self.path.rsplit("/", 1)[1])
+        etag = f'"v{number}"'
+        if self.headers.get("If-None-Match") == etag:
+            self.send_response(304)
+            self.send_header("ETag", etag)
+            self.end_headers()
+            return
+
+        time.sleep(0.05 / number)  # responses finish out of input order
+        body = f"<html><body><p>Page {number}</p></body></html>".encode("utf-8")
+        self.server.full_responses += 1
+        self.send_response(200)
+        self.send_header("Content-Type", "text/html; charset=utf-8")
+        self.send_header("ETag", etag)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+@pytest.fixture
+def server(monkeypatch):
+    host_throttle = html_text_parser_.HostThrottle
+    monkeypatch.setattr(html_text_parser_, "HostThrottle", lambda: host_throttle(delay=0))
+    httpd = ThreadingHTTPServer(("127.0.0.1", 0), PageHandler)
+    httpd.full_responses = 0
+    thread = threading.Thread(target=httpd.serve_forever, daemon=True)
+    thread.start()
+    yield httpd
+    httpd.shutdown()
+    httpd.server_close()
+
+
+def page_urls(server, count):
+    return [f"http://127.0.0.1:{server.server_port}/page/{number}" for number in range(1, count + 1)]
+
+
+def test_crawl_yields_pages_in_input_order_and_reports_failures(server):
+    urls = page_urls(server, 6)
+    urls.insert(3, f"http://127.0.0.1:{server.server_port}/missing")
+
+    results = list(crawl(urls, concurrency=3))
+
+    assert [url for url, _, _ in results] == urls
+    assert results[3][1] is None and "404" in results[3][2]
+    assert [texts for _, texts, error in results if error is None] == [[f"Page {n}"] for n in range(1, 7)]
+
+
+def test_second_scrape_revalidates_with_the_page_cache(server, tmp_path):
+    urls = page_urls(server, 5)
+    merged_output = str(tmp_path / "merged.docx")
+
+    cache = PageCache(str(tmp_path / "cache.sqlite"))
+    assert scrape_urls(urls, merged_output=merged_output, concurrency=3, cache=cache) == []
+    cache.close()
+    assert server.full_responses == 5
+
+    cache = PageCache(str(tmp_path / "cache.sqlite"))
+    assert scrape_urls(urls, merged_output=merged_output, concurrency=3, cache=cache) == []
+    cache.close()
+    assert server.full_responses == 5
+    assert cache.revalidated == 5
+
+    paragraphs = [paragraph.text for paragraph in docx.Document(merged_output).paragraphs]
+    assert paragraphs == [line for n in range(1, 6) for line in (urls[n - 1], f"Page {n}")]
+
+
+def test_utf8_page_without_charset_header():
+    content = "<html><body><p>Grüße</p><script>var x = 1;</script></body></html>".encode("utf-8")
+    assert extract_text(content, declared_charset("text/html")) == ["Grüße"]
+
+
+def test_meta_charset_is_honoured():
+    content = '<html><head><meta charset="iso-8859-7"></head><body>Καλημέρα</body></html>'.encode("iso-8859-7")
+    assert extract_text(content, None) == ["Καλημέρα"]
+
+
+def test_header_charset_wins_over_meta():
+    content = '<meta charset="utf-8"><p>café</p>'.encode("latin-1")
+    assert extract_text(content, declared_charset('text/html; charset="ISO-8859-1"')) == ["café"]
+
+
+def test_unlabelled_legacy_page_falls_back():
+    assert extract_text("<p>café</p>".encode("windows-1252")) == ["café"]
@@ -0,0 +1,51 @@
+import os
+
+from media_index import MediaIndex
+
+
+def write(path, content=b"data"):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "wb") as f:
+        f.write(content)
+
+
+def test_refresh_reads_only_new_and_changed_files(tmp_path):
+    library = tmp_path / "library"
+    write(str(library / "a.txt"))
+    write(str(library / "trip" / "b.txt"))
+    write(str(library / "trip" / "c.txt"))
+    index = MediaIndex(str(tmp_path / "index.sqlite"))
+
+    assert index.refresh(str(library)) == (3, 0)
+    assert index.refresh(str(library)) == (0, 0)
+
+    write(str(library / "trip" / "b.txt"), b"changed content")
+    os.remove(library / "trip" / "c.txt")
+    assert index.refresh(str(library)) == (1, 1)
+
+    assert [os.path.basename(f.path) for f in index.files(str(library))] == ["a.txt", "b.txt"]
+    assert [os.path.basename(f.path) for f in index.files(str(library), recursive=False)] == ["a.txt"]
+    assert index.folders(str(library)) == [str(library / "trip")]
+    index.close()
+
+
+def test_rename_and_remove_cover_everything_below_a_folder(tmp_path):
+    library = tmp_path / "library"
+    write(str(library / "trip" / "day1" / "a.txt"))
+    write(str(library / "trip" / "b.txt"))
+    write(str(library / "trip2" / "c.txt"))
+    index = MediaIndex(str(tmp_path / "index.sqlite"))
+    index.refresh(str(library))
+
+    index.rename(str(library / "trip"), str(library / "2024 Trip"))
+    assert sorted(os.path.relpath(f.path, library) for f in index.files(str(library))) == [
+        os.path.join("2024 Trip", "b.txt"), os.path.join("2024 Trip", "day1", "a.txt"), os.path.join("trip2", "c.txt"),
+    ]
+    folders = index.folders(str(library))
+    assert folders[0] == str(library / "2024 Trip" / "day1")  # deepest first
+    assert sorted(folders) == sorted([str(library / "2024 Trip" / "day1"), str(library / "2024 Trip"), str(library / "trip2")])
+
+    index.remove(str(library / "2024 Trip"))
+    assert [os.path.relpath(f.path, library) for f in index.files(str(library))] == [os.path.join("trip2", "c.txt")]
+    assert index.folders(str(library)) == [str(library / "trip2")]
+    index.close()
@@ -0,0 +1,40 @@
+import math
+import random
+
+from offline_geocoder import EARTH_RADIUS_KM, OfflineGeocoder, build_index
+
+
+def haversine_km(lat1, lon1, lat2, lon2):
+    lat1, lon1, lat2, lon2 = map(math.radians, (lat1, lon1, lat2, lon2))
+    a = math.sin((lat2 - lat1) / 2) ** 2 + math.cos(lat1) * math.cos(lat2) * math.sin((lon2 - lon1) / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * math.asin(math.sqrt(a))
+
+
+def test_nearest_matches_brute_force_on_random_points(tmp_path):
+    rng = random.Random(42)
+    places = [
+        (math.degrees(math.asin(rng.uniform(-1, 1))), rng.uniform(-180, 180), {"city": f"Place {i}"})
+        for i in range(2000)
+    ]
+    index_file = str(tmp_path / "places.kdtree")
+    assert build_index(places, index_file) == len(places)
+
+    geocoder = OfflineGeocoder(index_file)
+    for _ in range(300):
+        lat, lon = math.degrees(math.asin(rng.uniform(-1, 1))), rng.uniform(-180, 180)
+        expected_km, expected = min(
+            (haversine_km(lat, lon, p_lat, p_lon), address["city"]) for p_lat, p_lon, address in places
+        )
+        address, distance_km = geocoder.nearest(lat, lon)
+        assert address == {"city": expected}
+        assert math.isclose(distance_km, expected_km, rel_tol=1e-6, abs_tol=1e-6)
+    geocoder.close()
+
+
+def test_empty_index_has_no_nearest_place(tmp_path):
+    index_file = str(tmp_path / "empty.kdtree")
+    build_index([], index_file)
+    geocoder = OfflineGeocoder(index_file)
+    assert geocoder.nearest(48.1, 11.6) == (None, None)
+    assert geocoder.reverse(48.1, 11.6) is None
+    geocoder.close()
@@ -0,0 +1,89 @@
+import os
+from datetime import date
+
+import openpyxl
+import pytest
+
+from pdf import STATEMENT_LAYOUTS, convert_pdf_folder, iter_result_pages, parse_statement_page
+
+
+@pytest.mark.parametrize("line, expected", [
+    ("01.02.2024 Gehalt 1200,00 4.656,78", (date(2024, 2, 1), "Gehalt", 1200.00, 4656.78)),
+    ("02.02.2024 Miete Februar 1.050,00- 3.606,78", (date(2024, 2, 2), "Miete Februar", -1050.00, 3606.78)),
+    ("03.02.2024 Kartenzahlung REWE 12 34,56-", (date(2024, 2, 3), "Kartenzahlung REWE 12", -34.56, None)),
+    ("04.02.2024 Zinsen 0,12 1234567,89", (date(2024, 2, 4), "Zinsen", 0.12, 1234567.89)),
+])
+def test_de_statement_lines(line, expected):
+    assert parse_statement_page(line, STATEMENT_LAYOUTS["de"]) == [expected]
+
+
+@pytest.mark.parametrize("line, expected", [
+    ("02/01/2024 Salary 1200.00 4,656.78", (date(2024, 2, 1), "Salary", 1200.00, 4656.78)),
+    ("02/02/2024 Rent 1,050.00- 3,606.78", (date(2024, 2, 2), "Rent", -1050.00, 3606.78)),
+    ("02/03/2024 Coffee -4.50", (date(2024, 2, 3), "Coffee", -4.50, None)),
+])
+def test_en_statement_lines(line, expected):
+    assert parse_statement_page(line, STATEMENT_LAYOUTS["en"]) == [expected]
+
+
+def test_non_statement_lines_are_ignored():
+    assert parse_statement_page("Kontoauszug Nr. 2\nSeite 1 von 3", STATEMENT_LAYOUTS["de"]) == []
+
+
+def write_text_pdf(path, page_texts):
+    """Minimal PDF with one line of Helvetica text per page."""
+    objects = ["<< /Type /Catalog /Pages 2 0 R >>", None, "<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>"]
+    kids = []
+    for text in page_texts:
+        stream = f"BT /F1 12 Tf 72 720 Td ({text}) Tj ET"
+        objects.append(f"<< /Length {len(stream)} >>\nstream\n{stream}\nendstream")
+        objects.append(f"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 792] "
+                       f"/Resources << /Font << /F1 3 0 R >> >> /Contents {len(objects)} 0 R >>")
+        kids.append(f"{len(objects)} 0 R")
+    objects[1] = f"<< /Type /Pages /Kids [{' '.join(kids)}] /Count {len(kids)} >>"
+
+    data = b"%PDF-1.4\n"
+    offsets = []
+    for number, body in enumerate(objects, start=1):
+        offsets.append(len(data))
+        data += f"{number} 0 obj\n{body}\nendobj\n".encode("latin-1")
+    xref = len(data)
+    data += f"xref\n0 {len(objects) + 1}\n0000000000 65535 f \n".encode("latin-1")
+    data += "".join(f"{offset:010d} 00000 n \n" for offset in offsets).encode("latin-1")
+    data += f"trailer\n<< /Size {len(objects) + 1} /Root 1 0 R >>\nstartxref\n{xref}\n%%EOF\n".encode("latin-1")
+    path.write_bytes(data)
+
+
+def test_convert_pdf_folder_keeps_pages_in_order(tmp_path):
+    pdf_folder, output_folder = tmp_path / "pdfs", tmp_path / "xlsx"
+    pdf_folder.mkdir()
+    page_counts = {"a.pdf": 7, "b.pdf": 1, "c.pdf": 3}
+    for name, count in page_counts.items():
+        write_text_pdf(pdf_folder / name, [f"{name} page {i}" for i in range(count)])
+
+    convert_pdf_folder(str(pdf_folder), str(output_folder), workers=2, pages_per_task=2)
+
+    for name, count in page_counts.items():
+        workbook = openpyxl.load_workbook(output_folder / name.replace(".pdf", ".xlsx"), read_only=True)
+        lines = [row[0] for row in workbook.active.iter_rows(values_only=True)]
+        workbook.close()
+        assert lines == [f"{name} page {i}" for i in range(count)]
+
+
+def test_convert_pdf_folder_skips_broken_files(tmp_path):
+    pdf_folder, output_folder = tmp_path / "pdfs", tmp_path / "xlsx"
+    pdf_folder.mkdir()
+    write_text_pdf(pdf_folder / "a.pdf", ["a page 0", "a page 1"])
+    (pdf_folder / "b.pdf").write_bytes(b"%PDF-1.4\nnot really a pdf")
+    write_text_pdf(pdf_folder / "c.pdf", ["c page 0"])
+
+    failed = convert_pdf_folder(str(pdf_folder), str(output_folder), workers=2, pages_per_task=1)
+
+    assert [os.path.basename(pdf_filename) for pdf_filename, _ in failed] == ["b.pdf"]
+    assert sorted(os.listdir(output_folder)) == ["a.xlsx", "c.xlsx"]
+
+
+def test_failed_page_range_aborts_only_its_file():
+    results = [("x.pdf", ["page 0"], None), ("x.pdf", None, "PdfReadError: broken xref")]
+    with pytest.raises(RuntimeError, match="broken xref"):
+        list(iter_result_pages(results))
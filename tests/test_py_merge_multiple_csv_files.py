@@ -0,0 +1,30 @@
+import pytest
+
+from py_merge_multiple_csv_files import merge_csv_files, merge_to_parquet
+
+
+def test_align_files_drops_fields_beyond_the_header(tmp_path, capsys):
+    first, second = tmp_path / "data_1.csv", tmp_path / "data_2.csv"
+    first.write_text("id,amount\n1,10\n2,20,surplus\n", encoding="utf-8")
+    second.write_text("id,region\n3,EU\n", encoding="utf-8")
+    output = tmp_path / "out.csv"
+
+    merge_csv_files([str(first), str(second)], str(output))
+
+    assert output.read_text(encoding="utf-8").splitlines() == ["id,amount,region", "1,10,", "2,20,", "3,,EU"]
+    assert f"{first}, line 3: more fields than the header" in capsys.readouterr().out
+
+
+def test_merge_to_parquet_skips_empty_files_and_puts_the_source_column_last(tmp_path):
+    pq = pytest.importorskip("pyarrow.parquet")
+    first, empty, second = tmp_path / "data_1.csv", tmp_path / "data_2.csv", tmp_path / "data_3.csv"
+    first.write_text("id,amount\n1,10\n", encoding="utf-8")
+    empty.write_bytes(b"")
+    second.write_text("id,region\n2,EU\n", encoding="utf-8")
+    output = tmp_path / "out.parquet"
+
+    merge_to_parquet([str(first), str(empty), str(second)], str(output))
+
+    table = pq.read_table(output)
+    assert table.column_names == ["id", "amount", "region", "source_file"]
+    assert table.column("source_file").to_pylist() == ["data_1.csv", "data_3.csv"]
@@ -0,0 +1,71 @@
+import os
+
+import pytest
+
+import renamer
+
+
+def make_files(folder, names):
+    for name in names:
+        (folder / name).write_text(name, encoding="utf-8")
+
+
+def contents(folder):
+    return {name: (folder / name).read_text(encoding="utf-8")
+            for name in os.listdir(folder) if name != renamer.JOURNAL_NAME}
+
+
+def swap_plan(folder):
+    return [(str(folder / "a.mp4"), str(folder / "b.mp4")), (str(folder / "b.mp4"), str(folder / "a.mp4")),
+            (str(folder / "c.mp4"), str(folder / "1.mp4"))]
+
+
+def test_undo_after_complete_run(tmp_path):
+    make_files(tmp_path, ["a.mp4", "b.mp4", "c.mp4"])
+    journal = str(tmp_path / renamer.JOURNAL_NAME)
+    renamer.apply_plan(swap_plan(tmp_path), journal)
+    assert contents(tmp_path) == {"a.mp4": "b.mp4", "b.mp4": "a.mp4", "1.mp4": "c.mp4"}
+
+    renamer.undo_rename(journal)
+    assert contents(tmp_path) == {"a.mp4": "a.mp4", "b.mp4": "b.mp4", "c.mp4": "c.mp4"}
+
+
+@pytest.mark.parametrize("failing_rename", [1, 2, 3, 4, 5, 6])
+def test_undo_after_interrupted_run(tmp_path, monkeypatch, failing_rename):
+    make_files(tmp_path, ["a.mp4", "b.mp4", "c.mp4"])
+    journal = str(tmp_path / renamer.JOURNAL_NAME)
+    real_rename, calls = os.rename, []
+
+    def crashing_rename(src, dst):
+        calls.append(src)
+        if len(calls) == failing_rename:
+            raise KeyboardInterrupt
+        real_rename(src, dst)
+
+    monkeypatch.setattr(renamer.os, "rename", crashing_rename)
+    with pytest.raises(KeyboardInterrupt):
+        renamer.apply_plan(swap_plan(tmp_path), journal)
+    monkeypatch.setattr(renamer.os, "rename", real_rename)
+
+    renamer.undo_rename(journal)
+    assert contents(tmp_path) == {"a.mp4": "a.mp4", "b.mp4": "b.mp4", "c.mp4": "c.mp4"}
+
+
+def test_undo_when_run_died_before_marking_complete(tmp_path, monkeypatch):
+    make_files(tmp_path, ["a.mp4", "b.mp4", "c.mp4"])
+    journal = str(tmp_path / renamer.JOURNAL_NAME)
+    real_write_journal = renamer.write_journal
+
+    def crashing_write_journal(journal_path, steps, phase):
+        if phase == "complete":
+            raise KeyboardInterrupt
+        real_write_journal(journal_path, steps, phase)
+
+    monkeypatch.setattr(renamer, "write_journal", crashing_write_journal)
+    with pytest.raises(KeyboardInterrupt):
+        renamer.apply_plan(swap_plan(tmp_path), journal)
+    monkeypatch.setattr(renamer, "write_journal", real_write_journal)
+
+    renamer.undo_rename(journal)
+    assert contents(tmp_path) == {"a.mp4": "a.mp4", "b.mp4": "b.mp4", "c.mp4": "c.mp4"}
+    assert not os.path.exists(journal)
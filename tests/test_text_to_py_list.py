@@ -0,0 +1,34 @@
+import nltk
+
+import text_to_py_list
+from text_to_py_list import Tokenizer
+
+
+def test_punkt_resource_is_checked_once(monkeypatch):
+    lookups = []
+    monkeypatch.setattr(nltk.data, "find", lambda resource_path: lookups.append(resource_path))
+    monkeypatch.setattr(text_to_py_list, "word_tokenize", str.split)
+    text_to_py_list.ensure_nltk_resource.cache_clear()
+
+    tokenizer = Tokenizer()
+    tokenizer._stop_words = frozenset({"the"})
+    for _ in range(100):
+        assert tokenizer.tokenize("The price was too high") == ["price", "was", "too", "high"]
+
+    assert lookups == [text_to_py_list.PUNKT_RESOURCE[0]]
+    text_to_py_list.ensure_nltk_resource.cache_clear()
+
+
+
+def test_batch_reads_a_generator_only_a_window_ahead():
+    pulled = []
+
+    def documents():
+        for i in range(1000):
+            pulled.append(i)
+            yield f"Document number {i}"
+
+    results = Tokenizer(languages=(), fast=True).batch(documents(), workers=2, chunk_size=4)
+    assert next(results) == ["document", "number"]
+    assert len(pulled) <= (text_to_py_list.CHUNKS_AHEAD_PER_WORKER * 2 + 1) * 4
+    assert sum(1 for _ in results) == 999
@@ -1,15 +1,101 @@
-import nltk
-nltk.download('stopwords') # download the stopwords corpus
-nltk.download('punkt')
+import os
+import re
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache
+from itertools import islice
 
+import nltk
 from nltk.corpus import stopwords
 from nltk.tokenize import word_tokenize
 
+# Word characters for the fast tokenizer mode; non-alphabetic tokens are dropped afterwards
+WORD_PATTERN = re.compile(r"\w+")
+
+# word_tokenize loads the punkt_tab tables since NLTK 3.8.2, the pickled punkt model before that
+NLTK_VERSION = tuple(int(part) for part in re.findall(r"\d+", nltk.__version__)[:3])
+PUNKT_RESOURCE = ('tokenizers/punkt_tab', 'punkt_tab') if NLTK_VERSION >= (3, 8, 2) else ('tokenizers/punkt', 'punkt')
+
+# Tokenizer.batch: chunks queued per worker, so a generator of documents is never read far ahead
+CHUNKS_AHEAD_PER_WORKER = 4
+
+# download an NLTK resource the first time it is needed; checked once per process
+@lru_cache(maxsize=None)
+def ensure_nltk_resource(resource_path, package):
+    try:
+        nltk.data.find(resource_path)
+    except LookupError:
+        nltk.download(package)
+
+# stopword sets are loaded once per language and process
+@lru_cache(maxsize=None)
+def get_stopwords(language):
+    ensure_nltk_resource('corpora/stopwords', 'stopwords')
+    return frozenset(stopwords.words(language))
+
+class Tokenizer:
+    """Lowercases text, splits it into words and drops stopwords and non-alphabetic tokens.
+
+    fast=True uses a regex instead of punkt, for when punkt-level accuracy isn't needed.
+    """
+
+    def __init__(self, languages=('english',), fast=False):
+        self.languages = tuple(languages)
+        self.fast = fast
+        self._stop_words = None
+
+    @property
+    def stop_words(self):
+        if self._stop_words is None:
+            self._stop_words = frozenset().union(*(get_stopwords(language) for language in self.languages))
+        return self._stop_words
+
+    def tokenize(self, text):
+        text = text.lower()
+        if self.fast:
+            tokens = WORD_PATTERN.findall(text)
+        else:
+            ensure_nltk_resource(*PUNKT_RESOURCE)
+            tokens = word_tokenize(text)
+        stop_words = self.stop_words
+        return [token for token in tokens if token not in stop_words and token.isalpha()]
+
+    __call__ = tokenize
+
+    def batch(self, texts, workers=1, chunk_size=256):
+        """Tokenize an iterable of documents, yielding token lists in input order.
+
+        With workers > 1 (or None for one per CPU) the documents are spread over a process pool.
+        """
+        if workers == 1:
+            yield from map(self.tokenize, texts)
+            return
+        texts = iter(texts)
+        window = CHUNKS_AHEAD_PER_WORKER * (workers or os.cpu_count() or 1)
+        pending = deque()
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            for chunk in iter(lambda: list(islice(texts, chunk_size)), []):
+                if len(pending) >= window:
+                    yield from pending.popleft().result()
+                pending.append(executor.submit(self.tokenize_many, chunk))
+            while pending:
+                yield from pending.popleft().result()
+
+    def tokenize_many(self, texts):
+        return [self.tokenize(text) for text in texts]
+
+    def __getstate__(self):
+        # workers load their own stopword sets
+        state = self.__dict__.copy()
+        state['_stop_words'] = None
+        return state
+
+tokenizer = Tokenizer()
+
 def remove_stopwords(text):
-    stop_words = set(stopwords.words('english'))
-    tokens = word_tokenize(text.lower())
-    filtered_tokens = [token for token in tokens if token not in stop_words and token.isalpha()]
-    return filtered_tokens
+    return tokenizer.tokenize(text)
 
-text = ""
-print(result)
\ No newline at end of file
+if __name__ == '__main__':
+    text = ""
+    result = remove_stopwords(text)
+    print(result)